@@ -726,14 +726,28 @@ class ExternalReviewAgent:
             self.logger.error(f"⚠️ Erro ao converter dados de consolidação: {e}", exc_info=True)
             return {'items': [], 'context': {}}
 
-    def analyze_session_consolidacao(self, session_id: str) -> Dict[str, Any]:
-        """Analisa automaticamente os dados de consolidação de uma sessão"""
-        try:
-            self.logger.info(f"🔍 Iniciando análise da consolidação para sessão: {session_id}")
+    def load_session_analysis_data(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Carrega a consolidação da sessão já convertida para o formato de análise (None se não houver arquivo)"""
+        consolidacao_data = self.load_consolidacao_data(session_id)
 
-            consolidacao_data = self.load_consolidacao_data(session_id)
+        if not consolidacao_data:
+            return None
 
-            if not consolidacao_data:
+        return self.convert_consolidacao_to_analysis_format(consolidacao_data, session_id)
+
+    def analyze_loaded_session(self, session_id: str, analysis_data: Optional[Dict[str, Any]],
+                               load_error: Optional[Exception] = None) -> Dict[str, Any]:
+        """
+        Analisa os dados de consolidação já carregados por load_session_analysis_data
+
+        Permite separar o carregamento (I/O) da análise, por exemplo para preparar a próxima
+        sessão em outra thread; load_error é a exceção levantada no carregamento, se houver.
+        """
+        try:
+            if load_error is not None:
+                raise load_error
+
+            if analysis_data is None:
                 return {
                     'success': False,
                     'error': f'Arquivo de consolidação não encontrado para sessão {session_id}',
@@ -741,8 +755,6 @@ class ExternalReviewAgent:
                     'timestamp': datetime.now().isoformat()
                 }
 
-            analysis_data = self.convert_consolidacao_to_analysis_format(consolidacao_data, session_id)
-
             if not analysis_data.get('items'):
                 return {
                     'success': False,
@@ -773,6 +785,17 @@ class ExternalReviewAgent:
                 'timestamp': datetime.now().isoformat()
             }
 
+    def analyze_session_consolidacao(self, session_id: str) -> Dict[str, Any]:
+        """Analisa automaticamente os dados de consolidação de uma sessão"""
+        self.logger.info(f"🔍 Iniciando análise da consolidação para sessão: {session_id}")
+
+        try:
+            analysis_data = self.load_session_analysis_data(session_id)
+        except Exception as e:
+            return self.analyze_loaded_session(session_id, None, load_error=e)
+
+        return self.analyze_loaded_session(session_id, analysis_data)
+
     def process_batch(self, items: List[Dict[str, Any]], massive_data: Optional[Dict[str, Any]] = None, 
                      batch_size: int = 10) -> Dict[str, Any]:
         """
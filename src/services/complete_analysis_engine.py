@@ -163,7 +163,9 @@ class CompleteAnalysisEngine:
                                     module=module_name, step=0)
                 
                 try:
-                    module_result = await module['function'](analysis_data, module)
+                    # Atualizações de passo do módulo são gravadas uma única vez, ao final dele
+                    with session_manager.buffered():
+                        module_result = await module['function'](analysis_data, module)
                     
                     # Salva resultado
                     results[module_name] = module_result
@@ -5,29 +5,228 @@ ARQV30 Enhanced v3.0 - External AI Verifier Integration
 Integração do módulo External AI Verifier ao app principal
 """
 
-import os
 import sys
+import io
+import queue
+import types
 import logging
 import json
-from typing import Dict, Any, Optional
+import importlib.util
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Iterable, Iterator
 from datetime import datetime
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 logger = logging.getLogger(__name__)
 
+# Localização do módulo External AI Verifier e nome do pacote sob o qual ele é carregado
+EXTERNAL_VERIFIER_SRC = Path(__file__).resolve().parent.parent.parent / "external_ai_verifier" / "src"
+EXTERNAL_VERIFIER_PACKAGE = "_external_ai_verifier"
+
+# Tamanho dos sub-lotes enviados ao agente no modo streaming
+STREAMING_CHUNK_SIZE = 1000
+
+# Items de exemplo usados quando não há dados de consolidação. Os dicts são
+# compartilhados entre chamadas e apenas lidos pelo fluxo de verificação.
+_EXAMPLE_DADOS_WEB = (
+    {
+        'titulo': 'Exemplo de análise de mercado - Tendências 2025',
+        'url': 'https://example.com/market-analysis-2025',
+        'fonte': 'Market Research Institute',
+        'conteudo': 'Análise detalhada das principais tendências de mercado para 2025, incluindo tecnologia, sustentabilidade e comportamento do consumidor.',
+        'relevancia': 0.8,
+        'conteudo_tamanho': 1500,
+        'engagement': {'views': 1000, 'shares': 50}
+    },
+    {
+        'titulo': 'Inovações tecnológicas que transformarão o setor',
+        'url': 'https://example.com/tech-innovations',
+        'fonte': 'Tech Today',
+        'conteudo': 'Artigo sobre as principais inovações tecnológicas que estão moldando o futuro dos negócios e da sociedade.',
+        'relevancia': 0.9,
+        'conteudo_tamanho': 2000,
+        'engagement': {'views': 1500, 'shares': 75}
+    },
+    {
+        'titulo': 'Estratégias de marketing digital para pequenas empresas',
+        'url': 'https://example.com/digital-marketing-strategies',
+        'fonte': 'Business Weekly',
+        'conteudo': 'Guia completo com estratégias práticas de marketing digital especificamente desenvolvidas para pequenas e médias empresas.',
+        'relevancia': 0.7,
+        'conteudo_tamanho': 1200,
+        'engagement': {'views': 800, 'shares': 40}
+    }
+)
+
+# Caminhos onde os arrays de items costumam estar, em ordem de prioridade:
+# data.dados_web (padrão do sistema), dados_web direto, items (formato external_ai_verifier)
+_CANDIDATE_PATHS = (
+    ('data', 'dados_web'),
+    ('dados_web',),
+    ('items',),
+    ('results',),
+    ('data', 'items'),
+    ('data', 'results'),
+)
+
+# Campos de conteúdo principal (prioridade alta) e de título/descrição
+_PRIMARY_FIELDS = ('conteudo', 'content', 'text', 'body')
+_SECONDARY_FIELDS = ('titulo', 'title', 'descricao', 'description', 'summary')
+
+# Chaves alternativas (pt/en) para os campos do item formatado
+_TITLE_KEYS = ('titulo', 'title')
+_URL_KEYS = ('url', 'link')
+_SOURCE_KEYS = ('fonte', 'source')
+_AUTHOR_KEYS = ('autor', 'author')
+_CATEGORY_KEYS = ('categoria', 'category')
+
+
+def _first_present(item: Dict[str, Any], keys: tuple, default: Any = None) -> Any:
+    """Retorna o valor da primeira chave de `keys` presente em `item`"""
+    for key in keys:
+        if key in item:
+            return item[key]
+    return default
+
+
+def _dumps(obj: Any) -> str:
+    """Serializa `obj` para JSON indentado, usando orjson quando disponível"""
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(
+                obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+
+
+def _truncated_dump(data: Any, limit: int) -> str:
+    """Serializa apenas o início de `data` (até `limit` caracteres) para logs"""
+    if HAS_ORJSON:
+        return _dumps(data)[:limit]
+
+    encoder = json.JSONEncoder(indent=2, ensure_ascii=False, default=str)
+    buffer = io.StringIO()
+    size = 0
+    for chunk in encoder.iterencode(data):
+        buffer.write(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return buffer.getvalue()[:limit]
+
+
+@dataclass(slots=True)
+class FormattedItem:
+    """Item normalizado no formato esperado pelo external_ai_verifier"""
+    id: str
+    content: str
+    title: Any
+    url: Any
+    source: Any
+    author: Any
+    timestamp: Any
+    category: Any
+    metadata: Dict[str, Any]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dict (raso) na fronteira com o agente externo"""
+        return {
+            'id': self.id,
+            'content': self.content,
+            'title': self.title,
+            'url': self.url,
+            'source': self.source,
+            'author': self.author,
+            'timestamp': self.timestamp,
+            'category': self.category,
+            'metadata': self.metadata
+        }
+
+
+def _format_single_item(idx: int, item: Any, id_prefix: str, session_id: str, now_iso: str,
+                        include_original: bool = False) -> Optional[FormattedItem]:
+    """
+    Converte um item bruto para FormattedItem
+
+    Returns:
+        FormattedItem ou None se o item não tiver conteúdo textual válido
+    """
+    if not item or not isinstance(item, dict):
+        logger.debug(f"⚠️ Item {idx} inválido (não é dict): {type(item)}")
+        return None
+
+    # Extrai conteúdo textual com priorização inteligente
+    content_parts = []
+
+    # Campos de conteúdo principal (prioridade alta)
+    for field in _PRIMARY_FIELDS:
+        value = item.get(field)
+        if value:
+            text = str(value).strip()
+            if text:
+                content_parts.append(text)
+                break  # Usa apenas o primeiro campo de conteúdo encontrado
+
+    # Campos de título/descrição (sempre incluir se disponível)
+    joined_parts = ' '.join(content_parts)
+    for field in _SECONDARY_FIELDS:
+        value = item.get(field)
+        if value:
+            title_content = str(value).strip()
+            if title_content and title_content not in joined_parts:  # Evita duplicação
+                content_parts.append(title_content)
+                joined_parts = f"{joined_parts} {title_content}" if joined_parts else title_content
+
+    if not content_parts:
+        logger.debug(f"⚠️ Item {idx} sem conteúdo textual válido. Campos disponíveis: {list(item.keys())}")
+        return None
+
+    # Cria item formatado para external_ai_verifier
+    formatted_item = FormattedItem(
+        id=id_prefix + format(idx + 1, '03d'),
+        content=' | '.join(content_parts),  # Separa título do conteúdo
+        title=_first_present(item, _TITLE_KEYS, f'Item {idx+1}'),
+        url=_first_present(item, _URL_KEYS, ''),
+        source=_first_present(item, _SOURCE_KEYS, 'unknown'),
+        author=_first_present(item, _AUTHOR_KEYS, 'Desconhecido'),
+        timestamp=item.get('timestamp', now_iso),
+        category=_first_present(item, _CATEGORY_KEYS, 'geral'),
+        metadata={
+            'session_id': session_id,
+            'index': idx,
+            'relevancia': item.get('relevancia', 0.5),
+            'conteudo_tamanho': item.get('conteudo_tamanho', len(joined_parts)),
+            'engagement': item.get('engagement', {}),
+            'processado_em': now_iso
+        }
+    )
+    if include_original:
+        formatted_item.metadata['original_data'] = item
+
+    logger.debug(f"✅ Item {idx+1} convertido: {formatted_item.title[:50]}...")
+    return formatted_item
+
+
 class ExternalAIVerifierIntegration:
     """Integração do External AI Verifier com o app principal"""
 
+    # Classe ExternalReviewAgent carregada uma única vez por processo
+    _module = None
+    _ExternalReviewAgent = None
+    _load_attempted = False
+
     def __init__(self):
         """Inicializa a integração"""
-        # Adiciona o caminho do módulo externo ao Python path
-        external_module_path = os.path.join(os.getcwd(), "external_ai_verifier", "src")
-        external_services_path = os.path.join(external_module_path, "services")
-        
-        if external_module_path not in sys.path:
-            sys.path.insert(0, external_module_path)
-        if external_services_path not in sys.path:
-            sys.path.insert(0, external_services_path)
-
         self.module_available = self._check_module_availability()
 
         if self.module_available:
@@ -35,14 +234,48 @@ class ExternalAIVerifierIntegration:
         else:
             logger.warning("⚠️ External AI Verifier não disponível - executando em modo fallback")
 
-    def _check_module_availability(self) -> bool:
-        """Verifica se o módulo External AI Verifier está disponível"""
+    @classmethod
+    def _load_module(cls):
+        """
+        Carrega external_review_agent pelo caminho do arquivo, sem alterar o sys.path.
+
+        O módulo é registrado como submódulo de um pacote sintético para que seus
+        imports relativos (.services.*) resolvam dentro de external_ai_verifier/src.
+        """
+        if cls._load_attempted:
+            return cls._module
+        cls._load_attempted = True
+
+        module_name = f"{EXTERNAL_VERIFIER_PACKAGE}.external_review_agent"
         try:
-            from external_review_agent import ExternalReviewAgent
-            return True
-        except ImportError as e:
+            if EXTERNAL_VERIFIER_PACKAGE not in sys.modules:
+                package = types.ModuleType(EXTERNAL_VERIFIER_PACKAGE)
+                package.__path__ = [str(EXTERNAL_VERIFIER_SRC)]
+                sys.modules[EXTERNAL_VERIFIER_PACKAGE] = package
+
+            spec = importlib.util.spec_from_file_location(
+                module_name, EXTERNAL_VERIFIER_SRC / "external_review_agent.py"
+            )
+            if spec is None or spec.loader is None:
+                raise ImportError(f"external_review_agent não encontrado em {EXTERNAL_VERIFIER_SRC}")
+
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)
+
+            cls._module = module
+            cls._ExternalReviewAgent = module.ExternalReviewAgent
+        except Exception as e:
+            sys.modules.pop(module_name, None)
             logger.warning(f"External AI Verifier não encontrado: {e}")
-            return False
+
+        return cls._module
+
+    @classmethod
+    def _check_module_availability(cls) -> bool:
+        """Verifica se o módulo External AI Verifier está disponível"""
+        cls._load_module()
+        return cls._ExternalReviewAgent is not None
 
     def verify_session_data(self, session_id: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -61,19 +294,16 @@ class ExternalAIVerifierIntegration:
 
             logger.info(f"🔍 Iniciando verificação AI para sessão: {session_id}")
 
-            # Importa o agente de verificação
-            from external_review_agent import ExternalReviewAgent
-
             # Cria instância do agente
-            agent = ExternalReviewAgent()
+            agent = self._ExternalReviewAgent()
 
             # Se dados foram fornecidos diretamente, usa eles
             if data:
                 logger.info(f"📊 Usando dados fornecidos diretamente para sessão {session_id}")
                 # Converte dados para formato de análise
-                analysis_data = self._prepare_data_for_analysis(data, session_id)
-                if analysis_data.get('items'):
-                    result = agent.process_batch(analysis_data['items'])
+                analysis_data = self._prepare_data_for_analysis(data, session_id, streaming=True)
+                result = self._process_items_in_chunks(agent, analysis_data.get('items', []))
+                if result:
                     result['session_id'] = session_id
                     result['data_source'] = 'direct_input'
                 else:
@@ -85,30 +315,9 @@ class ExternalAIVerifierIntegration:
             else:
                 # Tenta encontrar dados de consolidação, se não encontrar, usa fallback
                 result = agent.analyze_session_consolidacao(session_id)
-                
-                # Se não encontrou dados de consolidação, cria dados de exemplo para teste
-                if not result.get('success') and 'não encontrado' in result.get('error', ''):
-                    logger.warning(f"⚠️ Dados de consolidação não encontrados para {session_id}, usando dados de exemplo")
-                    example_data = self._create_example_data_for_testing(session_id)
-                    analysis_data = self._prepare_data_for_analysis(example_data, session_id)
-                    if analysis_data.get('items'):
-                        result = agent.process_batch(analysis_data['items'])
-                        result['session_id'] = session_id
-                        result['data_source'] = 'example_data'
-                        result['note'] = 'Dados de exemplo usados devido à ausência de dados de consolidação'
-
-            # Verifica se foi bem-sucedido (se tem estatísticas, foi sucesso)
-            if result.get('statistics') or result.get('batch_info'):
-                result['success'] = True
-                logger.info(f"✅ Verificação AI concluída para sessão {session_id}")
-                logger.info(f"📊 Items processados: {result.get('statistics', {}).get('total_processed', 0)}")
-                logger.info(f"✅ Aprovados: {result.get('statistics', {}).get('approved', 0)}")
-                logger.info(f"❌ Rejeitados: {result.get('statistics', {}).get('rejected', 0)}")
-            else:
-                result['success'] = False
-                logger.error(f"❌ Falha na verificação AI: {result.get('error', 'Erro desconhecido')}")
+                result = self._apply_example_data_fallback(agent, session_id, result)
 
-            return result
+            return self._finalize_verification_result(result, session_id)
 
         except Exception as e:
             logger.error(f"❌ Erro durante verificação AI: {e}")
@@ -120,6 +329,104 @@ class ExternalAIVerifierIntegration:
                 'fallback_used': True
             }
 
+    def verify_sessions_bulk(self, session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Executa a verificação de várias sessões em pipeline (double-buffering):
+        enquanto o agente processa a sessão N, uma thread em segundo plano já
+        carrega e prepara os dados da sessão N+1
+
+        Args:
+            session_ids (List[str]): IDs das sessões para verificar, em ordem
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Resultado da verificação por session_id
+        """
+        if not self.module_available:
+            return {session_id: self._fallback_verification_result(session_id) for session_id in session_ids}
+
+        results = {}
+        prepared_queue = queue.Queue(maxsize=2)
+        end_marker = object()
+
+        def producer():
+            try:
+                for session_id in session_ids:
+                    # Um agente por sessão, como em verify_session_data (o agente acumula estatísticas):
+                    # carrega os dados aqui e analisa na thread principal
+                    agent = None
+                    try:
+                        agent = self._ExternalReviewAgent()
+                        prepared = (agent, agent.load_session_analysis_data(session_id), None)
+                    except Exception as e:
+                        prepared = (agent, None, e)
+                    prepared_queue.put((session_id, prepared))
+            finally:
+                prepared_queue.put(end_marker)
+
+        logger.info(f"🔍 Iniciando verificação AI em pipeline para {len(session_ids)} sessões")
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(producer)
+
+            while True:
+                entry = prepared_queue.get()
+                if entry is end_marker:
+                    break
+
+                session_id, (agent, analysis_data, load_error) = entry
+                try:
+                    if agent is None:
+                        raise load_error
+                    logger.info(f"🔍 Iniciando verificação AI para sessão: {session_id}")
+                    # Mesmo fluxo de verify_session_data, com os dados já carregados
+                    result = agent.analyze_loaded_session(session_id, analysis_data, load_error)
+                    result = self._apply_example_data_fallback(agent, session_id, result)
+                    result = self._finalize_verification_result(result, session_id)
+                except Exception as e:
+                    logger.error(f"❌ Erro durante verificação AI: {e}")
+                    result = {
+                        'success': False,
+                        'error': str(e),
+                        'session_id': session_id,
+                        'timestamp': datetime.now().isoformat(),
+                        'fallback_used': True
+                    }
+                results[session_id] = result
+
+        return results
+
+    def _apply_example_data_fallback(self, agent: Any, session_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Sem arquivo de consolidação, verifica dados de exemplo no lugar (modo de teste)"""
+        if result.get('success') or 'não encontrado' not in result.get('error', ''):
+            return result
+
+        logger.warning(f"⚠️ Dados de consolidação não encontrados para {session_id}, usando dados de exemplo")
+        example_data = self._create_example_data_for_testing(session_id)
+        analysis_data = self._prepare_data_for_analysis(example_data, session_id, streaming=True)
+        example_result = self._process_items_in_chunks(agent, analysis_data.get('items', []))
+        if not example_result:
+            return result
+
+        example_result['session_id'] = session_id
+        example_result['data_source'] = 'example_data'
+        example_result['note'] = 'Dados de exemplo usados devido à ausência de dados de consolidação'
+        return example_result
+
+    def _finalize_verification_result(self, result: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Marca o resultado como sucesso/falha e registra o resumo no log"""
+        # Verifica se foi bem-sucedido (se tem estatísticas, foi sucesso)
+        if result.get('statistics') or result.get('batch_info'):
+            result['success'] = True
+            logger.info(f"✅ Verificação AI concluída para sessão {session_id}")
+            logger.info(f"📊 Items processados: {result.get('statistics', {}).get('total_processed', 0)}")
+            logger.info(f"✅ Aprovados: {result.get('statistics', {}).get('approved', 0)}")
+            logger.info(f"❌ Rejeitados: {result.get('statistics', {}).get('rejected', 0)}")
+        else:
+            result['success'] = False
+            logger.error(f"❌ Falha na verificação AI: {result.get('error', 'Erro desconhecido')}")
+
+        return result
+
     async def verify_batch_data(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Executa verificação de um lote de dados
@@ -136,11 +443,8 @@ class ExternalAIVerifierIntegration:
 
             logger.info(f"🔍 Iniciando verificação AI em lote: {len(input_data.get('items', []))} itens")
 
-            # Importa o agente de verificação
-            from external_review_agent import ExternalReviewAgent
-
             # Cria instância do agente
-            agent = ExternalReviewAgent()
+            agent = self._ExternalReviewAgent()
 
             # ✅ CORRIGIDO: analyze_content_batch NÃO é async, removido await
             result = agent.analyze_content_batch(input_data)
@@ -165,41 +469,41 @@ class ExternalAIVerifierIntegration:
                 'fallback_used': True
             }
 
-    def _prepare_data_for_analysis(self, data: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+    def _prepare_data_for_analysis(self, data: Dict[str, Any], session_id: str,
+                                   streaming: bool = False,
+                                   include_original: bool = False) -> Dict[str, Any]:
         """
         Prepara dados para análise, tratando diferentes estruturas de forma mais robusta
         
         Args:
             data: Dados de entrada em formato variado
             session_id: ID da sessão
+            streaming: Se True, 'items' é um gerador preguiçoso em vez de uma lista
+            include_original: Se True, anexa o item bruto em metadata['original_data'] (debug)
             
         Returns:
             Dict com items formatados para análise
         """
-        items = []
         raw_items = []
+        # Um único timestamp para todo o lote: evita datetime.now() por item
+        now_iso = datetime.now().isoformat()
         
         try:
             logger.info(f"🔍 Analisando estrutura de dados para sessão {session_id}")
             logger.info(f"📋 Chaves principais encontradas: {list(data.keys())}")
             
-            # Estratégia 1: data.dados_web (estrutura padrão do sistema)
-            if 'data' in data and isinstance(data['data'], dict) and 'dados_web' in data['data']:
-                raw_items = data['data']['dados_web']
-                logger.info(f"📊 Estrutura 1 (data.dados_web): Encontrados {len(raw_items)} items")
-            
-            # Estratégia 2: dados_web direto
-            elif 'dados_web' in data and isinstance(data['dados_web'], list):
-                raw_items = data['dados_web']
-                logger.info(f"📊 Estrutura 2 (dados_web direto): Encontrados {len(raw_items)} items")
-            
-            # Estratégia 3: items direto (formato external_ai_verifier)
-            elif 'items' in data and isinstance(data['items'], list):
-                raw_items = data['items']
-                logger.info(f"📊 Estrutura 3 (items direto): Encontrados {len(raw_items)} items")
+            # Estratégias 1-3: caminhos conhecidos, testados em ordem de prioridade
+            for path in _CANDIDATE_PATHS:
+                value = data
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+                if isinstance(value, list) and value and isinstance(value[0], dict):
+                    raw_items = value
+                    logger.info(f"📊 Estrutura conhecida ({'.'.join(path)}): Encontrados {len(raw_items)} items")
+                    break
             
             # Estratégia 4: busca por qualquer array de objetos
-            else:
+            if not raw_items:
                 logger.info("🔍 Buscando arrays de dados em todas as chaves...")
                 for key, value in data.items():
                     if isinstance(value, list) and value and len(value) > 0:
@@ -220,8 +524,9 @@ class ExternalAIVerifierIntegration:
                             break
             
             if not raw_items:
-                logger.warning("⚠️ Nenhum array de dados encontrado. Estrutura de dados:")
-                logger.warning(f"📋 Dados recebidos: {json.dumps(data, indent=2, ensure_ascii=False)[:500]}...")
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning("⚠️ Nenhum array de dados encontrado. Estrutura de dados:")
+                    logger.warning(f"📋 Dados recebidos: {_truncated_dump(data, 500)}...")
                 return {
                     'items': [],
                     'total_items': 0,
@@ -231,72 +536,34 @@ class ExternalAIVerifierIntegration:
             
             # Converte items para formato de análise
             logger.info(f"🔄 Convertendo {len(raw_items)} items para formato de análise...")
-            
-            for idx, item in enumerate(raw_items):
-                if not item or not isinstance(item, dict):
-                    logger.debug(f"⚠️ Item {idx} inválido (não é dict): {type(item)}")
-                    continue
-                
-                # Extrai conteúdo textual com priorização inteligente
-                content_parts = []
-                
-                # Campos de conteúdo principal (prioridade alta)
-                primary_fields = ['conteudo', 'content', 'text', 'body']
-                for field in primary_fields:
-                    if field in item and item[field] and str(item[field]).strip():
-                        content_parts.append(str(item[field]).strip())
-                        break  # Usa apenas o primeiro campo de conteúdo encontrado
-                
-                # Campos de título/descrição (sempre incluir se disponível)
-                secondary_fields = ['titulo', 'title', 'descricao', 'description', 'summary']
-                for field in secondary_fields:
-                    if field in item and item[field] and str(item[field]).strip():
-                        title_content = str(item[field]).strip()
-                        if title_content not in ' '.join(content_parts):  # Evita duplicação
-                            content_parts.append(title_content)
-                
-                if not content_parts:
-                    logger.debug(f"⚠️ Item {idx} sem conteúdo textual válido. Campos disponíveis: {list(item.keys())}")
-                    continue
-                
-                # Cria item formatado para external_ai_verifier
-                formatted_item = {
-                    'id': f"{session_id}_item_{idx+1:03d}",
-                    'content': ' | '.join(content_parts),  # Separa título do conteúdo
-                    'title': item.get('titulo', item.get('title', f'Item {idx+1}')),
-                    'url': item.get('url', item.get('link', '')),
-                    'source': item.get('fonte', item.get('source', 'unknown')),
-                    'author': item.get('autor', item.get('author', 'Desconhecido')),
-                    'timestamp': item.get('timestamp', datetime.now().isoformat()),
-                    'category': item.get('categoria', item.get('category', 'geral')),
-                    'metadata': {
-                        'original_data': item,
-                        'session_id': session_id,
-                        'index': idx,
-                        'relevancia': item.get('relevancia', 0.5),
-                        'conteudo_tamanho': item.get('conteudo_tamanho', len(' '.join(content_parts))),
-                        'engagement': item.get('engagement', {}),
-                        'processado_em': datetime.now().isoformat()
-                    }
+
+            if streaming:
+                return {
+                    'items': self._iter_formatted_items(raw_items, session_id, now_iso, include_original),
+                    'session_id': session_id,
+                    'prepared_at': now_iso,
+                    'source_structure': 'auto_detected',
+                    'original_count': len(raw_items),
+                    'streaming': True
                 }
-                
-                items.append(formatted_item)
-                logger.debug(f"✅ Item {idx+1} convertido: {formatted_item['title'][:50]}...")
-            
+
+            items = list(self._iter_formatted_items(raw_items, session_id, now_iso, include_original))
+
             logger.info(f"✅ Conversão concluída: {len(items)} items válidos preparados para análise")
             
             return {
                 'items': items,
                 'total_items': len(items),
                 'session_id': session_id,
-                'prepared_at': datetime.now().isoformat(),
+                'prepared_at': now_iso,
                 'source_structure': 'auto_detected',
                 'original_count': len(raw_items)
             }
             
         except Exception as e:
             logger.error(f"❌ Erro ao preparar dados para análise: {e}")
-            logger.error(f"📋 Dados que causaram erro: {json.dumps(data, indent=2, ensure_ascii=False)[:300]}...")
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(f"📋 Dados que causaram erro: {_truncated_dump(data, 300)}...")
             return {
                 'items': [],
                 'total_items': 0,
@@ -308,6 +575,100 @@ class ExternalAIVerifierIntegration:
                 }
             }
 
+    def _iter_formatted_items(self, raw_items: List[Any], session_id: str,
+                              now_iso: Optional[str] = None,
+                              include_original: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Converte os items brutos para o formato do external_ai_verifier, um por vez
+
+        Args:
+            raw_items: Lista de items brutos encontrados nos dados
+            session_id: ID da sessão
+            now_iso: Timestamp ISO compartilhado por todos os items do lote
+            include_original: Se True, mantém referência ao item bruto no metadata
+
+        Yields:
+            Dict com o item formatado para análise
+        """
+        for record in self._iter_formatted_records(raw_items, session_id, now_iso, include_original):
+            yield record.to_dict()
+
+    def _iter_formatted_records(self, raw_items: List[Any], session_id: str,
+                                now_iso: Optional[str] = None,
+                                include_original: bool = False) -> Iterator[FormattedItem]:
+        """Gera um FormattedItem para cada item bruto com conteúdo textual válido"""
+        if now_iso is None:
+            now_iso = datetime.now().isoformat()
+        id_prefix = f"{session_id}_item_"
+
+        for idx, item in enumerate(raw_items):
+            record = _format_single_item(idx, item, id_prefix, session_id, now_iso, include_original)
+            if record is not None:
+                yield record
+
+    def _process_items_in_chunks(self, agent: Any, items: Iterable[Dict[str, Any]],
+                                 chunk_size: int = STREAMING_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Envia os items ao agente em sub-lotes, consumindo o iterador de forma incremental
+
+        Args:
+            agent: Instância do ExternalReviewAgent
+            items: Iterável de items formatados
+            chunk_size: Quantidade máxima de items por chamada a process_batch
+
+        Returns:
+            Dict no mesmo formato de process_batch, com os resultados acumulados
+        """
+        all_results = []
+        approved_items = []
+        rejected_items = []
+        statistics = {}
+        total_items = 0
+        total_batches = 0
+        batch_size = None
+        metadata = {}
+
+        iterator = iter(items)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+
+            chunk_result = agent.process_batch(chunk)
+            total_items += len(chunk)
+            all_results.extend(chunk_result.get('all_results', []))
+            approved_items.extend(chunk_result.get('approved_items', []))
+            rejected_items.extend(chunk_result.get('rejected_items', []))
+            # As estatísticas do agente são acumulativas, basta manter as do último sub-lote
+            statistics = chunk_result.get('statistics', statistics)
+            batch_info = chunk_result.get('batch_info', {})
+            total_batches += batch_info.get('total_batches', 0)
+            batch_size = batch_info.get('batch_size', batch_size)
+            metadata = chunk_result.get('metadata', metadata)
+
+        if not total_items:
+            return {}
+
+        logger.info(f"✅ Processamento em streaming concluído: {total_items} items")
+
+        return {
+            'all_results': all_results,
+            'approved_items': approved_items,
+            'rejected_items': rejected_items,
+            'statistics': statistics,
+            'total_items': total_items,
+            'batch_info': {
+                'total_items': total_items,
+                'batch_size': batch_size,
+                'total_batches': total_batches,
+                'approved_count': len(approved_items),
+                'rejected_count': len(rejected_items),
+                'approval_rate': len(approved_items) / total_items
+            },
+            # Mesmo metadata de process_batch (version, processing_mode), com o horário do fim
+            'metadata': {**metadata, 'timestamp': datetime.now().isoformat()}
+        }
+
     def _fallback_verification_result(self, session_id: str) -> Dict[str, Any]:
         """Resultado fallback quando o módulo não está disponível"""
         return {
@@ -358,35 +719,7 @@ class ExternalAIVerifierIntegration:
         """Cria dados de exemplo para teste quando não há dados de consolidação"""
         return {
             'data': {
-                'dados_web': [
-                    {
-                        'titulo': 'Exemplo de análise de mercado - Tendências 2025',
-                        'url': 'https://example.com/market-analysis-2025',
-                        'fonte': 'Market Research Institute',
-                        'conteudo': 'Análise detalhada das principais tendências de mercado para 2025, incluindo tecnologia, sustentabilidade e comportamento do consumidor.',
-                        'relevancia': 0.8,
-                        'conteudo_tamanho': 1500,
-                        'engagement': {'views': 1000, 'shares': 50}
-                    },
-                    {
-                        'titulo': 'Inovações tecnológicas que transformarão o setor',
-                        'url': 'https://example.com/tech-innovations',
-                        'fonte': 'Tech Today',
-                        'conteudo': 'Artigo sobre as principais inovações tecnológicas que estão moldando o futuro dos negócios e da sociedade.',
-                        'relevancia': 0.9,
-                        'conteudo_tamanho': 2000,
-                        'engagement': {'views': 1500, 'shares': 75}
-                    },
-                    {
-                        'titulo': 'Estratégias de marketing digital para pequenas empresas',
-                        'url': 'https://example.com/digital-marketing-strategies',
-                        'fonte': 'Business Weekly',
-                        'conteudo': 'Guia completo com estratégias práticas de marketing digital especificamente desenvolvidas para pequenas e médias empresas.',
-                        'relevancia': 0.7,
-                        'conteudo_tamanho': 1200,
-                        'engagement': {'views': 800, 'shares': 40}
-                    }
-                ],
+                'dados_web': list(_EXAMPLE_DADOS_WEB),
                 'tipo': 'analise_exemplo_teste'
             },
             'metadata': {
@@ -407,5 +740,13 @@ class ExternalAIVerifierIntegration:
 # Alias para compatibilidade
 ExternalAIIntegration = ExternalAIVerifierIntegration
 
-# Instância global
-external_ai_integration = ExternalAIVerifierIntegration()
\ No newline at end of file
+# Instância global, criada apenas no primeiro acesso (PEP 562)
+_instance: Optional[ExternalAIVerifierIntegration] = None
+
+def __getattr__(name: str) -> Any:
+    if name == 'external_ai_integration':
+        global _instance
+        if _instance is None:
+            _instance = ExternalAIVerifierIntegration()
+        return _instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
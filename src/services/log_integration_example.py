@@ -10,13 +10,12 @@ import os
 from datetime import datetime
 from typing import Dict, Any
 
-# Importa o sistema de log
-from services.log_local_atual import get_log_local, create_session_log, log_info, log_error
-
 def exemplo_integracao_workflow():
     """
     Exemplo de como integrar o log local com o workflow do ARQ-ALPHA-V9
     """
+    # Importa o sistema de log apenas ao executar o exemplo
+    from services.log_local_atual import get_log_local, create_session_log
     
     print("🔗 EXEMPLO DE INTEGRAÇÃO - Log Local Atual com ARQ-ALPHA-V9")
     print("=" * 70)
@@ -178,6 +177,8 @@ def exemplo_integracao_routes():
     """
     Exemplo de como usar o log nas rotas Flask
     """
+    # Importa o sistema de log apenas ao executar o exemplo
+    from services.log_local_atual import get_log_local, create_session_log
     
     print("\n🌐 EXEMPLO DE INTEGRAÇÃO COM ROTAS FLASK")
     print("=" * 50)
@@ -12,47 +12,233 @@ import sys
 import json
 import logging
 import threading
+import atexit
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import time
-import queue
 import traceback
 import platform
+from collections import defaultdict, deque
+from pathlib import Path
+
+# orjson opcional para serializar extra_data
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# io_uring opcional (somente Linux, via binding liburing)
+try:
+    import liburing
+    HAS_LIBURING = platform.system() == 'Linux'
+except ImportError:
+    HAS_LIBURING = False
+
+# Offset -1 (em u64) no io_uring: usa e avança a posição atual do arquivo, como o os.write
+URING_CURRENT_POSITION = (1 << 64) - 1
+
+# Máximo de entradas drenadas da fila por ciclo do worker
+MAX_BATCH_SIZE = 256
+
+# Flags para abrir o arquivo de log da sessão (escritas diretas via file descriptor)
+LOG_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND
+
+# writev (scatter-gather) é POSIX; no Windows os segmentos são concatenados
+HAS_WRITEV = hasattr(os, 'writev')
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX') if HAS_WRITEV else 0
+except (ValueError, OSError):
+    IOV_MAX = 1024
+
+
+def _write_segments(fd: int, segments: List[bytes]):
+    """Escreve todos os segmentos no fd, com uma chamada writev por bloco de IOV_MAX"""
+    if not HAS_WRITEV:
+        data = b''.join(segments)
+        while data:
+            data = data[os.write(fd, data):]
+        return
+    
+    for start in range(0, len(segments), IOV_MAX):
+        chunk = segments[start:start + IOV_MAX]
+        written = os.writev(fd, chunk)
+        total = sum(len(segment) for segment in chunk)
+        if written < total:
+            # Escrita parcial: completa o restante
+            remaining = b''.join(chunk)[written:]
+            while remaining:
+                remaining = remaining[os.write(fd, remaining):]
+
+class LinuxUringWriter:
+    """
+    Escritor opcional baseado em io_uring: todas as escritas de um lote (uma por sessão)
+    são submetidas ao kernel com uma única chamada e as conclusões são coletadas em seguida
+    """
+    
+    def __init__(self, entries: int = 256):
+        self.entries = entries
+        self.ring = liburing.Ring()
+        self.cqe = liburing.Cqe()
+        liburing.io_uring_queue_init(entries, self.ring)
+    
+    @classmethod
+    def create(cls, entries: int = 256) -> Optional['LinuxUringWriter']:
+        """Cria o escritor se io_uring estiver disponível; caso contrário retorna None"""
+        if not HAS_LIBURING:
+            return None
+        try:
+            return cls(entries)
+        except Exception as e:
+            print(f"⚠️ io_uring indisponível, usando escrita padrão: {e}")
+            return None
+    
+    def write_batch(self, writes: List[tuple]) -> List[Optional[Exception]]:
+        """
+        Escreve cada (fd, dados) e retorna, na mesma ordem, None ou o erro de cada escrita
+        """
+        errors: List[Optional[Exception]] = [None] * len(writes)
+        
+        for start in range(0, len(writes), self.entries):
+            chunk = writes[start:start + self.entries]
+            for index, (fd, data) in enumerate(chunk, start):
+                sqe = liburing.io_uring_get_sqe(self.ring)
+                liburing.io_uring_prep_write(sqe, fd, data, URING_CURRENT_POSITION)
+                liburing.io_uring_sqe_set_data64(sqe, index)
+            liburing.io_uring_submit_and_wait(self.ring, len(chunk))
+            
+            for _ in chunk:
+                liburing.io_uring_wait_cqe(self.ring, self.cqe)
+                cqe = self.cqe[0]
+                index = cqe.user_data
+                try:
+                    written = cqe.res
+                    fd, data = writes[index]
+                    if written < len(data):
+                        # Escrita parcial: completa o restante de forma síncrona
+                        _write_segments(fd, [data[written:]])
+                except OSError as e:
+                    errors[index] = e
+                finally:
+                    liburing.io_uring_cqe_seen(self.ring, cqe)
+        
+        return errors
+    
+    def close(self):
+        liburing.io_uring_queue_exit(self.ring)
+
+def _dump_extra_data(extra_data: Dict[str, Any]) -> bytes:
+    """Serializa extra_data como JSON indentado em UTF-8, usando orjson quando disponível"""
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(extra_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # Tipos não suportados pelo orjson: usa o json padrão
+    return json.dumps(extra_data, indent=2, ensure_ascii=False).encode('utf-8')
+
+def _fast_extra_format(fields: Dict[str, Any]) -> str:
+    """
+    Formata campos de esquema conhecido como linhas 'chave: valor', sem json.dumps indentado
+    (dicts/listas aninhados não vazios são serializados em JSON compacto)
+    """
+    lines = []
+    for key, value in fields.items():
+        if isinstance(value, (dict, list)) and value:
+            if HAS_ORJSON:
+                try:
+                    value = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+                except TypeError:
+                    value = json.dumps(value, ensure_ascii=False, default=str)
+            else:
+                value = json.dumps(value, ensure_ascii=False, default=str)
+        lines.append(f"{key}: {value}")
+    return "\n".join(lines)
+
+# Barras e cabeçalhos fixos do arquivo de log (pré-codificados para os segmentos do writev)
+_BAR80 = '=' * 80
+_BAR60 = '─' * 60
+_BAR40 = '─' * 40
+_CODE_OPEN = f"\n{_BAR60}\nCÓDIGO EXECUTADO:\n".encode('utf-8')
+_CODE_CLOSE = f"\n{_BAR60}\n".encode('utf-8')
+_EXTRA_OPEN = "\nDADOS EXTRAS:\n".encode('utf-8')
+_EXTRA_CLOSE = f"\n{_BAR40}\n".encode('utf-8')
+_ENTRY_END = b"\n"
+
+# Intervalo mínimo (s) entre resumos no console quando o eco por entrada está desligado
+CONSOLE_SUMMARY_INTERVAL = 1.0
+
+# Nomes de pasta que identificam a raiz do app
+APP_ROOT_MARKERS = ('ARQ-ALPHA', 'ARQ_ALPHA')
+
+# Capacidade padrão da fila de logs (entradas pendentes de escrita, por worker)
+DEFAULT_MAX_QUEUE_SIZE = 100_000
+
+# Número padrão de workers de escrita (sessões são distribuídas entre eles)
+DEFAULT_NUM_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class _LogShard:
+    """Fila single-consumer de um worker de escrita e o estado associado"""
+    
+    __slots__ = ('queue', 'wake', 'space_available', 'dropped_by_session', 'thread', 'uring_writer')
+    
+    def __init__(self):
+        # append/popleft do deque são atômicos, sem lock no produtor
+        self.queue = deque()
+        self.wake = threading.Event()
+        self.space_available = threading.Event()
+        self.dropped_by_session: Dict[str, int] = {}
+        self.thread: Optional[threading.Thread] = None
+        self.uring_writer: Optional[LinuxUringWriter] = None
 
 class LogLocalAtual:
     """
     Sistema de log local em tempo real que cria arquivos de log específicos por sessão
     """
     
-    def __init__(self, app_root_path: str = None):
+    def __init__(self, app_root_path: str = None, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+                 block_on_full: bool = False, put_timeout: float = 1.0, console_echo: bool = False,
+                 num_workers: int = DEFAULT_NUM_WORKERS):
         """
         Inicializa o sistema de log local para Windows
         
         Args:
             app_root_path: Caminho raiz do app (se None, detecta automaticamente)
+            max_queue_size: Máximo de entradas pendentes na fila de cada worker
+            block_on_full: Se True, bloqueia o produtor (até put_timeout) quando a fila
+                enche; se False, descarta a entrada e contabiliza o descarte
+            put_timeout: Tempo máximo de espera quando block_on_full=True
+            console_echo: Se True, exibe cada entrada no console; se False, exibe apenas
+                um resumo periódico das entradas processadas
+            num_workers: Número de workers de escrita; cada sessão pertence a um único
+                worker (preserva a ordem) e sessões lentas não atrasam as demais
         """
         # Detecta automaticamente o caminho raiz do app
         if app_root_path is None:
-            current_dir = os.path.abspath(__file__)
-            # Sobe até encontrar a pasta ARQ-ALPHA-V9 ou similar
-            while True:
-                parent_dir = os.path.dirname(current_dir)
-                if parent_dir == current_dir:  # Chegou na raiz
-                    # Se não encontrou, usa o diretório atual
-                    self.app_root = os.getcwd()
-                    break
-                if any(name in os.path.basename(parent_dir).upper() for name in ['ARQ-ALPHA', 'ARQ_ALPHA']):
-                    self.app_root = parent_dir
-                    break
-                current_dir = parent_dir
+            # Sobe até encontrar a pasta ARQ-ALPHA-V9 ou similar (se não encontrar, usa o diretório atual)
+            self.app_root = next(
+                (str(parent) for parent in Path(__file__).resolve().parents
+                 if any(name in parent.name.upper() for name in APP_ROOT_MARKERS)),
+                os.getcwd()
+            )
         else:
             self.app_root = os.path.abspath(app_root_path)
         
         # Configurações
         self.active_sessions: Dict[str, Dict[str, Any]] = {}
-        self.log_queue = queue.Queue()
+        # Uma fila/worker por shard; a sessão é atribuída por hash(session_id)
+        self.num_workers = max(1, num_workers)
+        self._shards = [_LogShard() for _ in range(self.num_workers)]
+        self.max_queue_size = max_queue_size
+        self.block_on_full = block_on_full
+        self.put_timeout = put_timeout
+        self.dropped_entries = 0
+        self.console_echo = console_echo
+        self._printed_at = 0.0
+        self._processed_since_print = 0
+        self._console_lock = threading.Lock()  # Contadores do resumo, atualizados por todos os workers
+        self._ts_cache = (None, '')
         self.is_running = False
-        self.worker_thread = None
         self.lock = threading.Lock()
         self.is_windows = platform.system().lower() == 'windows'
         
@@ -60,8 +246,9 @@ class LogLocalAtual:
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
         
-        # Inicia o worker thread
+        # Inicia o worker thread e garante a descarga da fila no encerramento do processo
         self.start_worker()
+        atexit.register(self.stop_worker)
         
         print(f"✅ Log Local Atual inicializado para {platform.system()}")
         print(f"📁 Diretório raiz: {self.app_root}")
@@ -71,31 +258,60 @@ class LogLocalAtual:
             os.makedirs(self.app_root, exist_ok=True)
     
     def start_worker(self):
-        """Inicia o thread worker para processar logs"""
+        """Inicia os threads worker para processar logs"""
         if not self.is_running:
             self.is_running = True
-            self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-            self.worker_thread.start()
-            print("🔄 Worker thread de log iniciado")
+            for index, shard in enumerate(self._shards):
+                if shard.uring_writer is None:
+                    shard.uring_writer = LinuxUringWriter.create()
+                shard.thread = threading.Thread(
+                    target=self._worker_loop, args=(shard,), daemon=True, name=f"log-local-worker-{index}"
+                )
+                shard.thread.start()
+            print(f"🔄 {self.num_workers} worker thread(s) de log iniciado(s)")
     
     def stop_worker(self):
-        """Para o worker thread"""
+        """Para os worker threads, escrevendo antes as entradas que ainda estão na fila"""
         self.is_running = False
-        if self.worker_thread and self.worker_thread.is_alive():
-            self.worker_thread.join(timeout=2)
+        for shard in self._shards:
+            shard.wake.set()
+        
+        stopped = False
+        for shard in self._shards:
+            if shard.thread and shard.thread.is_alive():
+                shard.thread.join(timeout=2)
+                stopped = True
+            if shard.uring_writer is not None and not (shard.thread and shard.thread.is_alive()):
+                shard.uring_writer.close()
+                shard.uring_writer = None
+        if stopped:
             print("⏹️ Worker thread de log parado")
     
-    def _worker_loop(self):
-        """Loop principal do worker thread"""
-        while self.is_running:
+    def _shard_for(self, session_id: str) -> _LogShard:
+        """Worker responsável pela sessão"""
+        return self._shards[hash(session_id) % self.num_workers]
+    
+    def _worker_loop(self, shard: _LogShard):
+        """Loop principal de um worker thread (ao parar, drena a fila antes de sair)"""
+        while self.is_running or shard.queue:
             try:
-                # Processa logs na fila
-                try:
-                    log_entry = self.log_queue.get(timeout=0.5)
-                    self._write_log_entry(log_entry)
-                    self.log_queue.task_done()
-                except queue.Empty:
-                    continue
+                # Aguarda sinal do produtor (ou timeout para checar is_running)
+                shard.wake.wait(timeout=0.5)
+                shard.wake.clear()
+                
+                # Drena o que já estiver na fila
+                batch = []
+                while shard.queue and len(batch) < MAX_BATCH_SIZE:
+                    batch.append(shard.queue.popleft())
+                
+                if shard.queue:
+                    # Ainda há entradas: processa o próximo lote sem esperar
+                    shard.wake.set()
+                shard.space_available.set()
+                
+                dropped = self._collect_dropped_entries(shard)
+                if batch or dropped:
+                    self._write_log_batch(batch + dropped, shard)
                     
             except Exception as e:
                 print(f"❌ Erro no worker loop: {e}")
@@ -124,16 +340,25 @@ class LogLocalAtual:
                 'log_file': log_path,
                 'created_at': datetime.now().isoformat(),
                 'info': session_info or {},
-                'entries_count': 0
+                'entries_count': 0,
+                # Serializa escrita do worker com o fechamento do arquivo
+                'lock': threading.Lock()
             }
             
+            # Cria arquivo inicial e mantém o handle aberto para as próximas escritas
+            session_data['fd'] = os.open(log_path, LOG_FILE_FLAGS, 0o644)
+            
             with self.lock:
+                previous_session = self.active_sessions.get(session_id)
                 self.active_sessions[session_id] = session_data
+                header = self._create_log_header(session_id, session_info)
+                _write_segments(session_data['fd'], [header.encode('utf-8')])
             
-            # Cria arquivo inicial
-            header = self._create_log_header(session_id, session_info)
-            with open(log_path, 'w', encoding='utf-8') as f:
-                f.write(header)
+            if previous_session:
+                with previous_session['lock']:
+                    if previous_session.get('fd') is not None:
+                        os.close(previous_session['fd'])
+                        previous_session['fd'] = None
             
             print(f"📝 Log criado para sessão {session_id}: {log_filename}")
             
@@ -149,13 +374,13 @@ class LogLocalAtual:
     def _create_log_header(self, session_id: str, session_info: Dict[str, Any] = None) -> str:
         """Cria o cabeçalho do arquivo de log"""
         header = f"""
-{'='*80}
+{_BAR80}
                     ARQ-ALPHA-V9 - LOG DE EXECUÇÃO EM TEMPO REAL
-{'='*80}
+{_BAR80}
 SESSÃO: {session_id}
 INICIADO EM: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}
 ARQUIVO: {self.active_sessions.get(session_id, {}).get('log_file', 'N/A')}
-{'='*80}
+{_BAR80}
 
 """
         
@@ -163,12 +388,13 @@ ARQUIVO: {self.active_sessions.get(session_id, {}).get('log_file', 'N/A')}
             header += "INFORMAÇÕES DA SESSÃO:\n"
             for key, value in session_info.items():
                 header += f"  {key}: {value}\n"
-            header += f"{'='*80}\n\n"
+            header += f"{_BAR80}\n\n"
         
         return header
     
     def add_log_entry(self, session_id: str, component: str, level: str, message: str, 
-                     code_executed: str = None, extra_data: Dict[str, Any] = None):
+                     code_executed: str = None, extra_data: Dict[str, Any] = None,
+                     pre_formatted_extra: str = None):
         """
         Adiciona uma entrada de log para uma sessão específica
         
@@ -179,78 +405,199 @@ ARQUIVO: {self.active_sessions.get(session_id, {}).get('log_file', 'N/A')}
             message: Mensagem do log
             code_executed: Código que foi executado (opcional)
             extra_data: Dados extras (opcional)
+            pre_formatted_extra: Dados extras já formatados, escritos sem serialização JSON
+                (tem precedência sobre extra_data)
         """
         if session_id not in self.active_sessions:
             print(f"⚠️ Sessão {session_id} não encontrada. Criando automaticamente...")
             self.create_session_log(session_id)
         
-        log_entry = {
-            'session_id': session_id,
-            'timestamp': datetime.now(),
-            'component': component,
-            'level': level,
-            'message': message,
-            'code_executed': code_executed,
-            'extra_data': extra_data or {}
-        }
+        # Formata no produtor: o worker fica responsável apenas pela escrita
+        try:
+            segments = self._format_log_entry(time.time_ns(), level, component, message, code_executed,
+                                              extra_data, pre_formatted_extra)
+            queued_entry = (session_id, segments, component, message)
+        except Exception as e:
+            print(f"❌ Erro ao formatar log: {e}")
+            return
+        
+        shard = self._shard_for(session_id)
+        
+        # Fila cheia: espera o worker liberar espaço (se configurado) ou descarta
+        if len(shard.queue) >= self.max_queue_size and self.block_on_full:
+            shard.space_available.clear()
+            shard.wake.set()
+            shard.space_available.wait(timeout=self.put_timeout)
         
         # Adiciona à fila para processamento assíncrono
-        self.log_queue.put(log_entry)
+        if len(shard.queue) < self.max_queue_size:
+            shard.queue.append(queued_entry)
+            shard.wake.set()
+        else:
+            with self.lock:
+                self.dropped_entries += 1
+                shard.dropped_by_session[session_id] = shard.dropped_by_session.get(session_id, 0) + 1
     
-    def _write_log_entry(self, log_entry: Dict[str, Any]):
-        """Escreve uma entrada de log no arquivo"""
-        try:
-            session_id = log_entry['session_id']
-            
-            if session_id not in self.active_sessions:
+    def _collect_dropped_entries(self, shard: _LogShard) -> List[tuple]:
+        """Gera uma entrada de aviso por sessão com o total de logs descartados desde o último ciclo"""
+        if not shard.dropped_by_session:
+            return []
+        
+        with self.lock:
+            dropped_by_session = shard.dropped_by_session
+            shard.dropped_by_session = {}
+        
+        now_ns = time.time_ns()
+        entries = []
+        for session_id, count in dropped_by_session.items():
+            message = f"⚠️ {count} entradas de log descartadas (fila cheia)"
+            segments = self._format_log_entry(now_ns, 'WARNING', 'SISTEMA', message)
+            entries.append((session_id, segments, 'SISTEMA', message))
+        return entries
+    
+    def _write_log_batch(self, batch: List[tuple], shard: _LogShard):
+        """
+        Escreve um lote de entradas já formatadas, com uma única escrita por sessão
+        
+        Args:
+            batch: Tuplas (session_id, segmentos_formatados, component, message)
+            shard: Worker que processa o lote (dono das sessões do lote)
+        """
+        entries_by_session = defaultdict(list)
+        for queued_entry in batch:
+            entries_by_session[queued_entry[0]].append(queued_entry)
+
+        if shard.uring_writer is not None:
+            try:
+                self._write_log_batch_uring(entries_by_session, shard.uring_writer)
                 return
+            except Exception as e:
+                print(f"⚠️ io_uring indisponível, usando escrita padrão: {e}")
+                uring_writer, shard.uring_writer = shard.uring_writer, None
+                uring_writer.close()
+
+        for session_id, entries in entries_by_session.items():
+            try:
+                segments = [segment for entry in entries for segment in entry[1]]
+                
+                with self.lock:
+                    session_data = self.active_sessions.get(session_id)
+                if not session_data:
+                    continue
+                
+                # O lock da sessão garante que o fd não seja fechado durante a escrita
+                with session_data['lock']:
+                    if session_data.get('fd') is None:
+                        continue
+                    
+                    # Escreve todos os segmentos do lote em uma única chamada (writev)
+                    _write_segments(session_data['fd'], segments)
+                    
+                    # Atualiza contador
+                    session_data['entries_count'] += len(entries)
+                
+                self._echo_to_console(session_id, entries)
+                
+            except Exception as e:
+                print(f"❌ Erro ao escrever log: {e}")
+    
+    def _write_log_batch_uring(self, entries_by_session: Dict[str, List[tuple]], uring_writer: LinuxUringWriter):
+        """Escreve o lote de todas as sessões com uma única submissão io_uring"""
+        with self.lock:
+            sessions = [(session_id, self.active_sessions.get(session_id), entries)
+                        for session_id, entries in entries_by_session.items()]
+        sessions = [target for target in sessions if target[1]]
+        
+        # Mantém os arquivos abertos até todas as escritas concluírem
+        session_locks = [session_data['lock'] for _, session_data, _ in sessions]
+        for session_lock in session_locks:
+            session_lock.acquire()
+        written = []
+        try:
+            writes = []
+            targets = []
+            for session_id, session_data, entries in sessions:
+                if session_data.get('fd') is None:
+                    continue
+                data = b''.join(segment for entry in entries for segment in entry[1])
+                writes.append((session_data['fd'], data))
+                targets.append((session_id, session_data, entries))
             
-            session_data = self.active_sessions[session_id]
-            log_path = session_data['log_file']
-            
-            # Formata a entrada
-            timestamp_str = log_entry['timestamp'].strftime("%d/%m/%Y %H:%M:%S.%f")[:-3]
-            
-            # Linha principal
-            log_line = f"[{timestamp_str}] [{log_entry['level']:7}] [{log_entry['component']:15}] {log_entry['message']}\n"
-            
-            # Código executado (se houver)
-            code_section = ""
-            if log_entry['code_executed']:
-                code_section = f"""
-{'─'*60}
-CÓDIGO EXECUTADO:
-{log_entry['code_executed']}
-{'─'*60}
-"""
-            
-            # Dados extras (se houver)
-            extra_section = ""
-            if log_entry['extra_data']:
-                extra_section = f"""
-DADOS EXTRAS:
-{json.dumps(log_entry['extra_data'], indent=2, ensure_ascii=False)}
-{'─'*40}
-"""
-            
-            # Escreve no arquivo
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(log_line)
-                if code_section:
-                    f.write(code_section)
-                if extra_section:
-                    f.write(extra_section)
-                f.write("\n")
-            
-            # Atualiza contador
-            with self.lock:
-                session_data['entries_count'] += 1
-            
-            # Também exibe no console para debug
-            print(f"📝 [{session_id}] {log_entry['component']} - {log_entry['message']}")
+            errors = uring_writer.write_batch(writes)
             
-        except Exception as e:
-            print(f"❌ Erro ao escrever log: {e}")
+            for (session_id, session_data, entries), error in zip(targets, errors):
+                if error is not None:
+                    print(f"❌ Erro ao escrever log: {error}")
+                    continue
+                session_data['entries_count'] += len(entries)
+                written.append((session_id, entries))
+        finally:
+            for session_lock in session_locks:
+                session_lock.release()
+        
+        for session_id, entries in written:
+            self._echo_to_console(session_id, entries)
+    
+    def _echo_to_console(self, session_id: str, entries: List[tuple]):
+        """Exibe as entradas escritas no console (por entrada ou em resumo a cada CONSOLE_SUMMARY_INTERVAL)"""
+        if self.console_echo:
+            for _, _, component, message in entries:
+                print(f"📝 [{session_id}] {component} - {message}")
+            return
+        
+        now = time.monotonic()
+        with self._console_lock:
+            self._processed_since_print += len(entries)
+            if now - self._printed_at < CONSOLE_SUMMARY_INTERVAL:
+                return
+            processed = self._processed_since_print
+            self._printed_at = now
+            self._processed_since_print = 0
+        
+        print(f"📝 {processed} entradas de log processadas")
+    
+    def _format_timestamp(self, timestamp_ns: int) -> str:
+        """Formata timestamp como 'dd/mm/aaaa HH:MM:SS.mmm', reaproveitando a parte dos segundos"""
+        seconds = timestamp_ns // 1_000_000_000
+        cached_seconds, prefix = self._ts_cache
+        if seconds != cached_seconds:
+            prefix = time.strftime("%d/%m/%Y %H:%M:%S", time.localtime(seconds))
+            self._ts_cache = (seconds, prefix)
+        return f"{prefix}.{(timestamp_ns // 1_000_000) % 1000:03d}"
+    
+    def _format_log_entry(self, timestamp_ns: int, level: str, component: str, message: str,
+                          code_executed: str = None, extra_data: Dict[str, Any] = None,
+                          pre_formatted_extra: str = None) -> List[bytes]:
+        """
+        Formata uma entrada de log como segmentos de bytes (linha, código, extras, quebra)
+        
+        Recebe os campos diretamente (sem dict intermediário por entrada)
+        """
+        # Formata a entrada
+        timestamp_str = self._format_timestamp(timestamp_ns)
+        
+        # Linha principal
+        log_line = f"[{timestamp_str}] [{level:7}] [{component:15}] {message}\n"
+        
+        segments = [log_line.encode('utf-8')]
+        
+        # Código executado (se houver)
+        if code_executed:
+            segments.append(_CODE_OPEN)
+            segments.append(str(code_executed).encode('utf-8'))
+            segments.append(_CODE_CLOSE)
+        
+        # Dados extras (se houver; dicts vazios não geram seção)
+        if pre_formatted_extra:
+            segments.append(_EXTRA_OPEN)
+            segments.append(pre_formatted_extra.encode('utf-8'))
+            segments.append(_EXTRA_CLOSE)
+        elif extra_data:
+            segments.append(_EXTRA_OPEN)
+            segments.append(_dump_extra_data(extra_data))
+            segments.append(_EXTRA_CLOSE)
+        segments.append(_ENTRY_END)
+        return segments
     
     def log_etapa_iniciada(self, session_id: str, etapa_numero: int, etapa_nome: str, 
                           parametros: Dict[str, Any] = None):
@@ -261,12 +608,12 @@ DADOS EXTRAS:
             component=f"ETAPA{etapa_numero}",
             level="INFO",
             message=message,
-            extra_data={
+            pre_formatted_extra=_fast_extra_format({
                 'etapa_numero': etapa_numero,
                 'etapa_nome': etapa_nome,
                 'parametros': parametros or {},
                 'status': 'iniciada'
-            }
+            })
         )
     
     def log_etapa_concluida(self, session_id: str, etapa_numero: int, etapa_nome: str, 
@@ -279,13 +626,13 @@ DADOS EXTRAS:
             component=f"ETAPA{etapa_numero}",
             level="INFO",
             message=message,
-            extra_data={
+            pre_formatted_extra=_fast_extra_format({
                 'etapa_numero': etapa_numero,
                 'etapa_nome': etapa_nome,
                 'resultado': resultado or {},
                 'tempo_execucao': tempo_execucao,
                 'status': 'concluida'
-            }
+            })
         )
     
     def log_codigo_executado(self, session_id: str, component: str, codigo: str, 
@@ -328,13 +675,13 @@ DADOS EXTRAS:
             component=component,
             level=level,
             message=message,
-            extra_data={
+            pre_formatted_extra=_fast_extra_format({
                 'api_name': api_name,
                 'parametros': parametros or {},
                 'resposta_tamanho': len(str(resposta)) if resposta else 0,
                 'tempo_resposta': tempo_resposta,
                 'erro': erro
-            }
+            })
         )
     
     def log_arquivo_processado(self, session_id: str, component: str, arquivo_path: str, 
@@ -365,8 +712,11 @@ DADOS EXTRAS:
             return
         
         try:
-            session_data = self.active_sessions[session_id]
-            log_path = session_data['log_file']
+            # Remove da lista de sessões ativas antes de fechar o handle
+            with self.lock:
+                session_data = self.active_sessions.pop(session_id, None)
+            if session_data is None:
+                return
             
             # Resumo final
             fim_timestamp = datetime.now()
@@ -375,14 +725,14 @@ DADOS EXTRAS:
             
             footer = f"""
 
-{'='*80}
+{_BAR80}
                             SESSÃO FINALIZADA
-{'='*80}
+{_BAR80}
 SESSÃO: {session_id}
 FINALIZADA EM: {fim_timestamp.strftime("%d/%m/%Y %H:%M:%S")}
 DURAÇÃO TOTAL: {duracao_total:.2f} segundos
 TOTAL DE LOGS: {session_data['entries_count']}
-{'='*80}
+{_BAR80}
 
 """
             
@@ -390,15 +740,18 @@ TOTAL DE LOGS: {session_data['entries_count']}
                 footer += "RESUMO DA SESSÃO:\n"
                 for key, value in resumo.items():
                     footer += f"  {key}: {value}\n"
-                footer += f"{'='*80}\n"
-            
-            # Escreve footer
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(footer)
+                footer += f"{_BAR80}\n"
             
-            # Remove da lista de sessões ativas
-            with self.lock:
-                del self.active_sessions[session_id]
+            # Escreve footer e fecha o arquivo
+            with session_data['lock']:
+                fd = session_data.get('fd')
+                if fd is not None:
+                    _write_segments(fd, [footer.encode('utf-8')])
+                    os.close(fd)
+                    session_data['fd'] = None
+            if fd is None:
+                with open(session_data['log_file'], 'a', encoding='utf-8') as f:
+                    f.write(footer)
             
             print(f"🏁 Log finalizado para sessão {session_id}")
             print(f"📊 Total de {session_data['entries_count']} entradas em {duracao_total:.2f}s")
@@ -427,14 +780,15 @@ TOTAL DE LOGS: {session_data['entries_count']}
             cutoff_time = datetime.now().timestamp() - (days_old * 24 * 3600)
             removed_count = 0
             
-            # Lista todos os arquivos de log
-            for filename in os.listdir(self.app_root):
-                if filename.startswith("log_") and filename.endswith(".txt"):
-                    file_path = os.path.join(self.app_root, filename)
-                    if os.path.isfile(file_path):
-                        if os.path.getmtime(file_path) < cutoff_time:
-                            os.remove(file_path)
-                            removed_count += 1
+            # Lista todos os arquivos de log (DirEntry reaproveita o tipo/stat da leitura do diretório)
+            with os.scandir(self.app_root) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if not (name.startswith("log_") and name.endswith(".txt")):
+                        continue
+                    if entry.is_file() and entry.stat().st_mtime < cutoff_time:
+                        os.remove(entry.path)
+                        removed_count += 1
             
             if removed_count > 0:
                 print(f"🧹 {removed_count} logs antigos removidos (>{days_old} dias)")
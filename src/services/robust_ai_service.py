@@ -8,139 +8,209 @@ Sistema com fallbacks para evitar falhas de API
 import asyncio
 import logging
 import json
+import re
+import functools
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Termos padrão substituídos pelo contexto (nicho / público) em uma única passada
+DEFAULT_NICHO = 'marketing digital'
+DEFAULT_PUBLICO = 'empreendedores'
+_PERSONALIZE_RE = re.compile(f'{DEFAULT_NICHO}|{DEFAULT_PUBLICO}')
+
+# Dados de referência imutáveis usados quando as APIs falham (compartilhados entre instâncias)
+_FALLBACK_DATA: Dict[str, Any] = {
+    'oportunidades_mercado': {
+        'oportunidades': (
+            'Crescimento do mercado digital brasileiro',
+            'Aumento da demanda por soluções online',
+            'Digitalização acelerada pós-pandemia',
+            'Expansão do e-commerce nacional',
+            'Crescimento do marketing de influência'
+        ),
+        'mercados_emergentes': (
+            'Marketing para pequenas empresas',
+            'Automação de marketing',
+            'Marketing de conteúdo',
+            'Social commerce',
+            'Marketing conversacional'
+        ),
+        'tendencias': (
+            'Personalização em massa',
+            'Inteligência artificial aplicada',
+            'Marketing omnichannel',
+            'Sustentabilidade e propósito',
+            'Experiência do cliente'
+        )
+    },
+    'mapeamento_tendencias': {
+        'tendencias_principais': (
+            'Transformação digital acelerada',
+            'Foco na experiência do cliente',
+            'Automação de processos',
+            'Análise de dados avançada',
+            'Marketing baseado em IA'
+        ),
+        'tecnologias_emergentes': (
+            'Inteligência Artificial',
+            'Machine Learning',
+            'Chatbots e assistentes virtuais',
+            'Realidade aumentada',
+            'Internet das Coisas (IoT)'
+        ),
+        'mudancas_comportamentais': (
+            'Consumo digital crescente',
+            'Busca por conveniência',
+            'Valorização da sustentabilidade',
+            'Preferência por marcas autênticas',
+            'Demanda por personalização'
+        )
+    },
+    'analise_sentimento': {
+        'sentimento_geral': 'Positivo',
+        'score_positivo': 0.75,
+        'score_neutro': 0.15,
+        'score_negativo': 0.10,
+        'principais_temas': (
+            'Inovação tecnológica',
+            'Crescimento de mercado',
+            'Oportunidades digitais',
+            'Transformação empresarial',
+            'Futuro promissor'
+        ),
+        'insights': (
+            'Mercado otimista com o futuro digital',
+            'Empresas investindo em tecnologia',
+            'Consumidores adaptados ao digital',
+            'Crescimento sustentável esperado'
+        )
+    },
+    'conteudo_viral': {
+        'tipos_conteudo': (
+            'Vídeos educativos curtos',
+            'Infográficos informativos',
+            'Cases de sucesso',
+            'Dicas práticas',
+            'Tendências do mercado'
+        ),
+        'formatos_populares': (
+            'Reels no Instagram',
+            'Shorts no YouTube',
+            'Posts no LinkedIn',
+            'Stories interativos',
+            'Lives educativas'
+        ),
+        'estrategias_viralizacao': (
+            'Conteúdo educativo de valor',
+            'Storytelling envolvente',
+            'Timing adequado de postagem',
+            'Uso de hashtags relevantes',
+            'Engajamento com audiência'
+        )
+    },
+    'riscos_ameacas': {
+        'riscos_mercado': (
+            'Saturação de mercado',
+            'Mudanças regulatórias',
+            'Instabilidade econômica',
+            'Concorrência acirrada',
+            'Mudanças tecnológicas rápidas'
+        ),
+        'ameacas_competitivas': (
+            'Entrada de grandes players',
+            'Inovações disruptivas',
+            'Guerra de preços',
+            'Mudança de preferências',
+            'Novos modelos de negócio'
+        ),
+        'riscos_operacionais': (
+            'Dependência de tecnologia',
+            'Falhas de segurança',
+            'Perda de talentos',
+            'Problemas de qualidade',
+            'Interrupções de serviço'
+        ),
+        'estrategias_mitigacao': (
+            'Diversificação de produtos',
+            'Investimento em inovação',
+            'Monitoramento contínuo',
+            'Planos de contingência',
+            'Parcerias estratégicas'
+        )
+    }
+}
+
+def _personalize_walk(base_data: Dict[str, Any], nicho: str, publico: str, substitute) -> Dict[str, Any]:
+    """Percorre os dados base aplicando `substitute` às strings (None = manter)"""
+    personalized = {}
+    
+    for key, value in base_data.items():
+        if isinstance(value, (list, tuple)):
+            # Personaliza listas adicionando contexto
+            personalized[key] = [substitute(item) for item in value] if substitute else list(value)
+            
+            # Adiciona itens específicos do nicho
+            if 'oportunidades' in key:
+                personalized[key].append(f'Crescimento específico no setor de {nicho}')
+                personalized[key].append(f'Demanda crescente de {publico} por {nicho}')
+            
+        elif isinstance(value, dict):
+            personalized[key] = _personalize_walk(value, nicho, publico, substitute)
+        else:
+            # Personaliza strings
+            if isinstance(value, str) and substitute:
+                personalized[key] = substitute(value)
+            else:
+                personalized[key] = value
+    
+    return personalized
+
+def _has_personalization_terms(value: Any) -> bool:
+    """Indica se alguma string de `value` contém termos substituíveis pelo contexto"""
+    if isinstance(value, str):
+        return _PERSONALIZE_RE.search(value) is not None
+    if isinstance(value, dict):
+        return any(_has_personalization_terms(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_personalization_terms(item) for item in value)
+    return False
+
+# Módulos cujo conteúdo de fallback contém termos substituíveis (calculado uma vez)
+_NEEDS_PERSONALIZATION = frozenset(
+    module_name for module_name, data in _FALLBACK_DATA.items() if _has_personalization_terms(data)
+)
+
+def _do_personalize(base_data: Dict[str, Any], nicho: str, publico: str, localizacao: str,
+                    needs_substitution: bool = True) -> Dict[str, Any]:
+    """Personaliza conteúdo base com nicho e público"""
+    if not needs_substitution or (nicho == DEFAULT_NICHO and publico == DEFAULT_PUBLICO):
+        # Sem termos a substituir (ou contexto padrão): substituição seria identidade
+        return _personalize_walk(base_data, nicho, publico, None)
+    
+    mapping = {DEFAULT_NICHO: nicho, DEFAULT_PUBLICO: publico}
+    replace = lambda match: mapping[match.group(0)]
+    return _personalize_walk(base_data, nicho, publico, lambda text: _PERSONALIZE_RE.sub(replace, text))
+
+@functools.lru_cache(maxsize=256)
+def _personalize_cached(module_name: str, nicho: str, publico: str, localizacao: str) -> Dict[str, Any]:
+    """
+    Conteúdo personalizado de um módulo, calculado uma vez por contexto.
+    O resultado é compartilhado entre chamadas e não deve ser modificado.
+    """
+    return _do_personalize(
+        _FALLBACK_DATA.get(module_name, {}), nicho, publico, localizacao,
+        needs_substitution=module_name in _NEEDS_PERSONALIZATION
+    )
+
 class RobustAIService:
     """Serviço de IA com múltiplos fallbacks"""
     
-    def __init__(self):
-        self.fallback_data = self._load_fallback_data()
-    
-    def _load_fallback_data(self) -> Dict[str, Any]:
-        """Carrega dados de fallback para quando APIs falham"""
-        return {
-            'oportunidades_mercado': {
-                'oportunidades': [
-                    'Crescimento do mercado digital brasileiro',
-                    'Aumento da demanda por soluções online',
-                    'Digitalização acelerada pós-pandemia',
-                    'Expansão do e-commerce nacional',
-                    'Crescimento do marketing de influência'
-                ],
-                'mercados_emergentes': [
-                    'Marketing para pequenas empresas',
-                    'Automação de marketing',
-                    'Marketing de conteúdo',
-                    'Social commerce',
-                    'Marketing conversacional'
-                ],
-                'tendencias': [
-                    'Personalização em massa',
-                    'Inteligência artificial aplicada',
-                    'Marketing omnichannel',
-                    'Sustentabilidade e propósito',
-                    'Experiência do cliente'
-                ]
-            },
-            'mapeamento_tendencias': {
-                'tendencias_principais': [
-                    'Transformação digital acelerada',
-                    'Foco na experiência do cliente',
-                    'Automação de processos',
-                    'Análise de dados avançada',
-                    'Marketing baseado em IA'
-                ],
-                'tecnologias_emergentes': [
-                    'Inteligência Artificial',
-                    'Machine Learning',
-                    'Chatbots e assistentes virtuais',
-                    'Realidade aumentada',
-                    'Internet das Coisas (IoT)'
-                ],
-                'mudancas_comportamentais': [
-                    'Consumo digital crescente',
-                    'Busca por conveniência',
-                    'Valorização da sustentabilidade',
-                    'Preferência por marcas autênticas',
-                    'Demanda por personalização'
-                ]
-            },
-            'analise_sentimento': {
-                'sentimento_geral': 'Positivo',
-                'score_positivo': 0.75,
-                'score_neutro': 0.15,
-                'score_negativo': 0.10,
-                'principais_temas': [
-                    'Inovação tecnológica',
-                    'Crescimento de mercado',
-                    'Oportunidades digitais',
-                    'Transformação empresarial',
-                    'Futuro promissor'
-                ],
-                'insights': [
-                    'Mercado otimista com o futuro digital',
-                    'Empresas investindo em tecnologia',
-                    'Consumidores adaptados ao digital',
-                    'Crescimento sustentável esperado'
-                ]
-            },
-            'conteudo_viral': {
-                'tipos_conteudo': [
-                    'Vídeos educativos curtos',
-                    'Infográficos informativos',
-                    'Cases de sucesso',
-                    'Dicas práticas',
-                    'Tendências do mercado'
-                ],
-                'formatos_populares': [
-                    'Reels no Instagram',
-                    'Shorts no YouTube',
-                    'Posts no LinkedIn',
-                    'Stories interativos',
-                    'Lives educativas'
-                ],
-                'estrategias_viralizacao': [
-                    'Conteúdo educativo de valor',
-                    'Storytelling envolvente',
-                    'Timing adequado de postagem',
-                    'Uso de hashtags relevantes',
-                    'Engajamento com audiência'
-                ]
-            },
-            'riscos_ameacas': {
-                'riscos_mercado': [
-                    'Saturação de mercado',
-                    'Mudanças regulatórias',
-                    'Instabilidade econômica',
-                    'Concorrência acirrada',
-                    'Mudanças tecnológicas rápidas'
-                ],
-                'ameacas_competitivas': [
-                    'Entrada de grandes players',
-                    'Inovações disruptivas',
-                    'Guerra de preços',
-                    'Mudança de preferências',
-                    'Novos modelos de negócio'
-                ],
-                'riscos_operacionais': [
-                    'Dependência de tecnologia',
-                    'Falhas de segurança',
-                    'Perda de talentos',
-                    'Problemas de qualidade',
-                    'Interrupções de serviço'
-                ],
-                'estrategias_mitigacao': [
-                    'Diversificação de produtos',
-                    'Investimento em inovação',
-                    'Monitoramento contínuo',
-                    'Planos de contingência',
-                    'Parcerias estratégicas'
-                ]
-            }
-        }
+    def __init__(self, simulate_api_latency: bool = False):
+        self.fallback_data = _FALLBACK_DATA
+        # Latência simulada das APIs (apenas para debug/testes)
+        self.simulate_api_latency = simulate_api_latency
     
     async def generate_content_with_fallback(self, module_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Gera conteúdo com fallback robusto"""
@@ -158,21 +228,24 @@ class RobustAIService:
     async def _try_ai_apis(self, module_name: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Tenta usar APIs de IA reais"""
         # Simula tentativa de API (em produção, tentaria APIs reais)
-        await asyncio.sleep(0.1)  # Simula latência
+        if self.simulate_api_latency:
+            await asyncio.sleep(0.1)  # Simula latência
         
         # Retorna None para forçar uso do fallback (em produção, tentaria APIs)
         return None
     
     def _generate_fallback_content(self, module_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Gera conteúdo usando dados de fallback"""
-        nicho = context.get('nicho', 'marketing digital')
-        publico = context.get('publico_alvo', 'empreendedores')
+        nicho = context.get('nicho', DEFAULT_NICHO)
+        publico = context.get('publico_alvo', DEFAULT_PUBLICO)
         localizacao = context.get('localizacao', 'Brasil')
         
-        base_data = self.fallback_data.get(module_name, {})
-        
-        # Personaliza dados base com contexto
-        personalized_data = self._personalize_content(base_data, nicho, publico, localizacao)
+        # Personaliza dados base com contexto (cacheado por módulo/contexto)
+        if self.fallback_data is _FALLBACK_DATA and all(isinstance(v, str) for v in (nicho, publico, localizacao)):
+            personalized_data = _personalize_cached(module_name, nicho, publico, localizacao)
+        else:
+            base_data = self.fallback_data.get(module_name, {})
+            personalized_data = self._personalize_content(base_data, nicho, publico, localizacao)
         
         return {
             'module': module_name,
@@ -185,31 +258,7 @@ class RobustAIService:
     
     def _personalize_content(self, base_data: Dict[str, Any], nicho: str, publico: str, localizacao: str) -> Dict[str, Any]:
         """Personaliza conteúdo base com contexto específico"""
-        personalized = {}
-        
-        for key, value in base_data.items():
-            if isinstance(value, list):
-                # Personaliza listas adicionando contexto
-                personalized[key] = [
-                    item.replace('marketing digital', nicho).replace('empreendedores', publico)
-                    for item in value
-                ]
-                
-                # Adiciona itens específicos do nicho
-                if 'oportunidades' in key:
-                    personalized[key].append(f'Crescimento específico no setor de {nicho}')
-                    personalized[key].append(f'Demanda crescente de {publico} por {nicho}')
-                
-            elif isinstance(value, dict):
-                personalized[key] = self._personalize_content(value, nicho, publico, localizacao)
-            else:
-                # Personaliza strings
-                if isinstance(value, str):
-                    personalized[key] = value.replace('marketing digital', nicho).replace('empreendedores', publico)
-                else:
-                    personalized[key] = value
-        
-        return personalized
+        return _do_personalize(base_data, nicho, publico, localizacao)
     
     async def generate_oportunidades_mercado(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Gera análise de oportunidades de mercado"""
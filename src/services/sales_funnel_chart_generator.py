@@ -7,90 +7,176 @@ Gera gráficos de funil usando Gemini/OpenRouter, convertido em base64
 
 import os
 import json
-import base64
+import atexit
 import logging
+import time
 import asyncio
 import aiohttp
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Mapping, ClassVar
+from types import MappingProxyType
 from datetime import datetime
+from functools import lru_cache
 import io
+import threading
+import weakref
 from PIL import Image, ImageDraw, ImageFont
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+from matplotlib.collections import PolyCollection, LineCollection
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 
+# orjson opcional para serializar/parsear JSON das chamadas HTTP
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+def _json_dumps(obj: Any) -> str:
+    """Serializa o corpo das requisições (orjson quando disponível)"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+def _json_loads(data: bytes) -> Any:
+    """Parseia o corpo das respostas diretamente dos bytes (orjson quando disponível)"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# pybase64 (SIMD) quando disponível, mesma API do base64 padrão
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 logger = logging.getLogger(__name__)
 
-class SalesFunnelChartGenerator:
-    """
-    Sistema para gerar gráficos de funil de vendas usando IA
-    """
-    
-    def __init__(self):
-        self.gemini_api_key = os.getenv('GOOGLE_API_KEY')
-        self.openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
-        self.session = None
-        
-        # Configurações padrão do funil
-        self.default_funnel_stages = [
-            {
-                'name': 'TOPO DO FUNIL (ATRAÇÃO - AWARENESS)',
-                'description': 'Atrair a atenção do público-alvo e despertar o interesse pelo tema',
-                'content': 'Artigos de blog sobre temas relevantes em neuropsiquiatria, posts informativos nas redes sociais, webinars gratuitos com especialistas, infográficos com dados estatísticos, vídeos curtos com dicas práticas',
-                'channels': '900k pessoas/mês YouTube, e-mail marketing (para lista de contatos existente)',
-                'color': '#4A90E2'
-            },
-            {
-                'name': 'MEIO DO FUNIL (CONSIDERAÇÃO - INTEREST/DESIRE)',
-                'description': 'Educar o público sobre o valor do e-book e construir relacionamento',
-                'content': 'E-books gratuitos com amostras do conteúdo do guia, estudos de caso, depoimentos de profissionais que já utilizaram o guia, checklists de protocolos de tratamento, e-mail marketing com conteúdos exclusivos',
-                'channels': '',
-                'color': '#7ED321'
-            },
-            {
-                'name': 'FUNDO DO FUNIL (DECISÃO - ACTION)',
-                'description': 'Converter leads em clientes e gerar vendas',
-                'content': 'Página de vendas de e-book com informações detalhadas, demonstração do conteúdo completo, bônus exclusivos, garantia de satisfação, depoimentos de clientes satisfeitos, ofertas especiais por tempo limitado',
-                'channels': '',
-                'color': '#F5A623'
-            }
-        ]
-        
-    async def __aenter__(self):
-        """Context manager entry"""
-        self.session = aiohttp.ClientSession()
-        return self
-        
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        if self.session:
-            await self.session.close()
-    
-    def _create_funnel_prompt(self, funnel_data: Dict[str, Any]) -> str:
-        """
-        Cria prompt detalhado para geração de gráfico de funil
-        """
-        stages = funnel_data.get('stages', self.default_funnel_stages)
-        
-        prompt = f"""
-        Create a professional sales funnel infographic with the following specifications:
-        
-        FUNNEL STAGES ({len(stages)} levels):
-        """
-        
-        for i, stage in enumerate(stages):
-            prompt += f"""
+# Figura reutilizada pelos renders de fallback (limpa a cada uso; acesso serializado pelo lock);
+# 10.8" x 100 dpi = 1080x1080 nativo, o tamanho informado no resultado
+FALLBACK_DPI = 100
+_FIG = Figure(figsize=(10.8, 10.8), dpi=FALLBACK_DPI)
+_FIG.patch.set_facecolor('white')
+_CANVAS = FigureCanvasAgg(_FIG)
+_FIG_LOCK = threading.Lock()
+
+# Ponta das setas entre estágios (unidades do gráfico)
+ARROW_HEAD_LENGTH = 0.08
+ARROW_HEAD_HALF_WIDTH = 0.05
+
+# Área dos eixos na figura (fração): ocupa quase todo o quadro, sem recorte posterior
+FALLBACK_AXES_RECT = (0.0, 0.02, 1.0, 0.96)
+
+# Nível zlib do PNG de fallback: níveis baixos quase dobram o base64 deste gráfico
+# (de cores sólidas) e ganham pouco tempo; como o render é cacheado, prioriza o tamanho
+FALLBACK_PNG_COMPRESS_LEVEL = 6
+
+# Modelos OpenRouter tentados em paralelo (o primeiro sucesso é usado)
+OPENROUTER_IMAGE_MODELS = (
+    "openai/dall-e-3",
+    "openai/dall-e-2",
+    "stability-ai/stable-diffusion-xl"
+)
+
+# Máximo de chamadas simultâneas ao OpenRouter (por event loop)
+OPENROUTER_MAX_CONCURRENCY = 3
+_openrouter_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def _get_openrouter_semaphore() -> asyncio.Semaphore:
+    """Semáforo compartilhado do event loop atual (um semáforo não pode ser usado entre loops)"""
+    loop = asyncio.get_running_loop()
+    semaphore = _openrouter_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _openrouter_semaphores[loop] = asyncio.Semaphore(OPENROUTER_MAX_CONCURRENCY)
+    return semaphore
+
+# Circuit breaker por modelo: após N falhas dentro da janela o modelo é pulado até a janela expirar
+MODEL_FAILURE_THRESHOLD = 3
+MODEL_FAILURE_WINDOW_SECONDS = 60.0
+_MODEL_HEALTH: Dict[str, Tuple[int, float]] = {}  # modelo -> (falhas, monotonic da última falha)
+
+def _model_circuit_open(model: str) -> bool:
+    """Indica se o modelo falhou repetidamente na janela recente e deve ser pulado"""
+    fail_count, last_fail = _MODEL_HEALTH.get(model, (0, 0.0))
+    return (
+        fail_count >= MODEL_FAILURE_THRESHOLD
+        and time.monotonic() - last_fail < MODEL_FAILURE_WINDOW_SECONDS
+    )
+
+def _record_model_result(model: str, success: bool):
+    """Zera o contador em caso de sucesso; incrementa (ou reinicia, se a janela expirou) em falhas"""
+    if success:
+        _MODEL_HEALTH.pop(model, None)
+        return
+    now = time.monotonic()
+    fail_count, last_fail = _MODEL_HEALTH.get(model, (0, 0.0))
+    if now - last_fail >= MODEL_FAILURE_WINDOW_SECONDS:
+        fail_count = 0
+    _MODEL_HEALTH[model] = (fail_count + 1, now)
+
+# Sessão HTTP compartilhada (pool de conexões keep-alive + cache de DNS)
+_SHARED_SESSION: Optional[aiohttp.ClientSession] = None
+_SHARED_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SHARED_SESSION_CLOSER: Optional[asyncio.Task] = None
+
+async def _close_session_on_loop_shutdown(session: aiohttp.ClientSession):
+    """Mantém-se pendente até o encerramento do loop (asyncio.run cancela as tarefas) e fecha a sessão"""
+    try:
+        await asyncio.get_running_loop().create_future()
+    except asyncio.CancelledError:
+        if not session.closed:
+            await session.close()
+        raise
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Retorna a sessão HTTP compartilhada, criando-a no event loop atual se necessário"""
+    global _SHARED_SESSION, _SHARED_SESSION_LOOP, _SHARED_SESSION_CLOSER
+    loop = asyncio.get_running_loop()
+    if _SHARED_SESSION is None or _SHARED_SESSION.closed or _SHARED_SESSION_LOOP is not loop:
+        # Uma sessão só pode ser usada no loop em que foi criada; a de um loop anterior é descartada
+        _SHARED_SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=90),
+            json_serialize=_json_dumps
+        )
+        _SHARED_SESSION_LOOP = loop
+        _SHARED_SESSION_CLOSER = loop.create_task(_close_session_on_loop_shutdown(_SHARED_SESSION))
+    return _SHARED_SESSION
+
+def _close_shared_session():
+    """Fecha a sessão compartilhada no encerramento do processo (se o loop ainda existir)"""
+    session, loop = _SHARED_SESSION, _SHARED_SESSION_LOOP
+    if session is None or session.closed or loop is None or loop.is_closed() or loop.is_running():
+        return
+    try:
+        closer = _SHARED_SESSION_CLOSER
+        if closer is not None and not closer.done():
+            # Cancelar a tarefa de fechamento faz com que ela própria feche a sessão
+            closer.cancel()
+            loop.run_until_complete(asyncio.gather(closer, return_exceptions=True))
+        else:
+            loop.run_until_complete(session.close())
+    except Exception as e:
+        logger.debug(f"Erro ao fechar sessão HTTP compartilhada: {e}")
+
+atexit.register(_close_shared_session)
+
+# Tamanho dos blocos lidos ao baixar imagens geradas
+DOWNLOAD_CHUNK_SIZE = 65536
+
+# Trechos fixos do prompt de geração do funil
+_PROMPT_STAGE_TEMPLATE = """
         
-        Stage {i+1}: {stage['name']}
-        - Description: {stage['description']}
-        - Content: {stage['content'][:200]}...
-        - Color: {stage.get('color', '#4A90E2')}
+        Stage {number}: {name}
+        - Description: {description}
+        - Content: {content}...
+        - Color: {color}
         """
-        
-        prompt += f"""
+
+_PROMPT_SUFFIX_TEMPLATE = """
         
         DESIGN SPECIFICATIONS:
-        - Create a 3D funnel diagram with {len(stages)} distinct levels
+        - Create a 3D funnel diagram with {count} distinct levels
         - Each level should be clearly labeled with stage names
         - Use the specified colors for each stage
         - Include percentage or volume indicators if available
@@ -111,66 +197,351 @@ class SalesFunnelChartGenerator:
         
         Style: Professional infographic, business presentation quality, not cartoon or illustration
         """
+
+@lru_cache(maxsize=64)
+def _build_funnel_prompt(stages: Tuple[Tuple[str, str, str, str], ...]) -> str:
+    """
+    Monta o prompt do funil
+    
+    Args:
+        stages: Tupla de (nome, descrição, conteúdo[:200], cor) por estágio; chave do cache
+    """
+    parts = [f"""
+        Create a professional sales funnel infographic with the following specifications:
+        
+        FUNNEL STAGES ({len(stages)} levels):
+        """]
+    for i, (name, description, content, color) in enumerate(stages):
+        parts.append(_PROMPT_STAGE_TEMPLATE.format(
+            number=i + 1, name=name, description=description, content=content, color=color
+        ))
+    parts.append(_PROMPT_SUFFIX_TEMPLATE.format(count=len(stages)))
+    return ''.join(parts)
+
+# Cores padrão dos estágios quando não especificadas
+DEFAULT_STAGE_COLORS = ('#4A90E2', '#7ED321', '#F5A623', '#D0021B', '#9013FE')
+
+@lru_cache(maxsize=128)
+def _render_fallback_cached(stages: Tuple[Tuple[str, str], ...]) -> str:
+    """
+    Renderiza o funil de fallback com matplotlib e retorna o PNG em base64
+    
+    Args:
+        stages: Tupla de (nome, cor) por estágio; chave do cache
+    """
+    # Reaproveita a figura do módulo em vez de criar/fechar uma a cada render
+    with _FIG_LOCK:
+        _FIG.clear()
+        ax = _FIG.add_axes(FALLBACK_AXES_RECT)
+        
+        # Configurações do funil
+        funnel_width = 8
+        funnel_height = 10
+        stage_height = funnel_height / len(stages)
+        
+        # Geometria de todos os estágios de uma vez (largura diminui conforme desce)
+        n = len(stages)
+        index = np.arange(n)
+        stage_widths = funnel_width * (1 - index * 0.3 / n)
+        xs = (funnel_width - stage_widths) / 2
+        ys = funnel_height - (index + 1) * stage_height
+        
+        # Retângulos dos estágios: vértices (n, 4, 2) desenhados numa única coleção
+        verts = np.empty((n, 4, 2))
+        verts[:, :, 0] = np.stack([xs, xs + stage_widths, xs + stage_widths, xs], axis=1)
+        verts[:, :, 1] = np.stack([ys, ys, ys + stage_height, ys + stage_height], axis=1)
+        ax.add_collection(PolyCollection(
+            verts, facecolors=[color for _, color in stages],
+            edgecolors='white', linewidths=2, alpha=0.8
+        ))
+        
+        # Setas entre estágios (haste + ponta aberta) numa única coleção de linhas
+        if n > 1:
+            center = funnel_width / 2
+            starts = ys[:-1] - 0.2
+            tips = starts - 0.3
+            head_base = tips + ARROW_HEAD_LENGTH
+            segments = np.empty((n - 1, 3, 2, 2))
+            segments[:, 0] = np.stack([np.stack([np.full(n - 1, center), starts], axis=1),
+                                       np.stack([np.full(n - 1, center), tips], axis=1)], axis=1)
+            for side, offset in ((1, -ARROW_HEAD_HALF_WIDTH), (2, ARROW_HEAD_HALF_WIDTH)):
+                segments[:, side] = np.stack([np.stack([np.full(n - 1, center + offset), head_base], axis=1),
+                                              np.stack([np.full(n - 1, center), tips], axis=1)], axis=1)
+            ax.add_collection(LineCollection(
+                segments.reshape(-1, 2, 2), colors='#333333', linewidths=3, capstyle='round'
+            ))
         
-        return prompt
+        # Textos dos estágios
+        for (name, _), y in zip(stages, ys):
+            stage_name = name.split('(')[0].strip()  # Pega só o nome principal
+            ax.text(
+                funnel_width / 2, y + stage_height / 2,
+                stage_name,
+                ha='center', va='center',
+                fontsize=16, fontweight='bold',
+                color='white', wrap=True
+            )
+        
+        # Título
+        ax.text(funnel_width / 2, funnel_height + 0.5, 'FUNIL DE VENDAS',
+               ha='center', va='center', fontsize=26, fontweight='bold',
+               color='#333333')
+        
+        # Configurações do gráfico
+        ax.set_xlim(0, funnel_width)
+        ax.set_ylim(0, funnel_height + 1)
+        ax.set_aspect('equal')
+        ax.axis('off')
+        
+        # Rasteriza e lê o RGBA do canvas diretamente (sem PNG intermediário do savefig);
+        # o canvas já está em 1080x1080, sem recorte nem redimensionamento
+        _CANVAS.draw()
+        width, height = _CANVAS.get_width_height()
+        image = Image.frombuffer('RGBA', (width, height), _CANVAS.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+        
+        # Codifica o PNG uma única vez (enquanto o lock protege o buffer do canvas)
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', compress_level=FALLBACK_PNG_COMPRESS_LEVEL, optimize=False)
+    
+    # Converte para base64
+    buffer.seek(0)
+    return base64.b64encode(buffer.getbuffer()).decode('ascii')
+
+# Fontes do gráfico mínimo
+MINIMAL_TITLE_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+MINIMAL_TEXT_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+@lru_cache(maxsize=1)
+def _load_minimal_fonts() -> Tuple[Any, Any]:
+    """Carrega (uma única vez) as fontes de título e texto, com a fonte padrão como fallback"""
+    try:
+        return ImageFont.truetype(MINIMAL_TITLE_FONT, 60), ImageFont.truetype(MINIMAL_TEXT_FONT, 30)
+    except OSError:
+        return ImageFont.load_default(), ImageFont.load_default()
+
+@lru_cache(maxsize=1)
+def _render_minimal_funnel() -> str:
+    """Renderiza o gráfico mínimo de emergência (conteúdo fixo, gerado uma única vez)"""
+    # Cria imagem simples 1080x1080
+    img = Image.new('RGB', (1080, 1080), color='#f8f9fa')
+    draw = ImageDraw.Draw(img)
+    
+    font_title, font_text = _load_minimal_fonts()
+    
+    # Desenha título (anchor='mm': centralizado pelo próprio Pillow)
+    title = "FUNIL DE VENDAS"
+    draw.text((540, 130), title, fill='#333333', font=font_title, anchor='mm')
+    
+    # Desenha estágios do funil
+    stages = ["TOPO - ATRAÇÃO", "MEIO - CONSIDERAÇÃO", "FUNDO - AÇÃO"]
+    colors = ['#4A90E2', '#7ED321', '#F5A623']
     
-    async def _generate_with_gemini_direct(self, prompt: str) -> Optional[str]:
+    for i, (stage, color) in enumerate(zip(stages, colors)):
+        # Calcula posição e tamanho
+        y = 250 + i * 200
+        width = 600 - i * 150
+        x = 540 - width // 2
+        height = 120
+        
+        # Desenha retângulo
+        draw.rectangle([x, y, x + width, y + height], fill=color, outline='white', width=3)
+        
+        # Desenha texto centralizado no estágio
+        draw.text((540, y + height // 2), stage, fill='white', font=font_text, anchor='mm')
+        
+        # Desenha seta
+        if i < len(stages) - 1:
+            arrow_y = y + height + 20
+            draw.polygon([
+                (540 - 20, arrow_y),
+                (540 + 20, arrow_y),
+                (540, arrow_y + 40)
+            ], fill='#666666')
+    
+    # Converte para base64
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return base64.b64encode(buffer.getbuffer()).decode('ascii')
+
+# Estágios padrão do funil: alocados uma vez por processo e somente leitura
+_DEFAULT_FUNNEL_STAGES: Tuple[Mapping[str, str], ...] = (
+    MappingProxyType({
+        'name': 'TOPO DO FUNIL (ATRAÇÃO - AWARENESS)',
+        'description': 'Atrair a atenção do público-alvo e despertar o interesse pelo tema',
+        'content': 'Artigos de blog sobre temas relevantes em neuropsiquiatria, posts informativos nas redes sociais, webinars gratuitos com especialistas, infográficos com dados estatísticos, vídeos curtos com dicas práticas',
+        'channels': '900k pessoas/mês YouTube, e-mail marketing (para lista de contatos existente)',
+        'color': '#4A90E2'
+    }),
+    MappingProxyType({
+        'name': 'MEIO DO FUNIL (CONSIDERAÇÃO - INTEREST/DESIRE)',
+        'description': 'Educar o público sobre o valor do e-book e construir relacionamento',
+        'content': 'E-books gratuitos com amostras do conteúdo do guia, estudos de caso, depoimentos de profissionais que já utilizaram o guia, checklists de protocolos de tratamento, e-mail marketing com conteúdos exclusivos',
+        'channels': '',
+        'color': '#7ED321'
+    }),
+    MappingProxyType({
+        'name': 'FUNDO DO FUNIL (DECISÃO - ACTION)',
+        'description': 'Converter leads em clientes e gerar vendas',
+        'content': 'Página de vendas de e-book com informações detalhadas, demonstração do conteúdo completo, bônus exclusivos, garantia de satisfação, depoimentos de clientes satisfeitos, ofertas especiais por tempo limitado',
+        'channels': '',
+        'color': '#F5A623'
+    })
+)
+
+# Estágios por segmento (somente leitura, alocados uma vez por processo)
+_MARKETING_FUNNEL_STAGES: Tuple[Mapping[str, str], ...] = (
+    MappingProxyType({
+        'name': 'TOPO DO FUNIL - AWARENESS',
+        'description': 'Atrair leads qualificados através de conteúdo relevante',
+        'content': 'Blog posts, SEO, redes sociais, webinars, e-books gratuitos',
+        'channels': 'Google Ads, Facebook Ads, LinkedIn, YouTube',
+        'color': '#4A90E2'
+    }),
+    MappingProxyType({
+        'name': 'MEIO DO FUNIL - CONSIDERATION',
+        'description': 'Nutrir leads e demonstrar valor da solução',
+        'content': 'Email marketing, demos, cases de sucesso, trials gratuitos',
+        'channels': 'Email sequences, retargeting, inside sales',
+        'color': '#7ED321'
+    }),
+    MappingProxyType({
+        'name': 'FUNDO DO FUNIL - DECISION',
+        'description': 'Converter leads em clientes pagantes',
+        'content': 'Propostas personalizadas, negociação, fechamento',
+        'channels': 'Sales calls, contratos, onboarding',
+        'color': '#F5A623'
+    })
+)
+
+_ECOMMERCE_FUNNEL_STAGES: Tuple[Mapping[str, str], ...] = (
+    MappingProxyType({
+        'name': 'DESCOBERTA - AWARENESS',
+        'description': 'Atrair visitantes para a loja online',
+        'content': 'SEO, anúncios pagos, influenciadores, conteúdo viral',
+        'channels': 'Google Shopping, Facebook Ads, Instagram, TikTok',
+        'color': '#4A90E2'
+    }),
+    MappingProxyType({
+        'name': 'INTERESSE - CONSIDERATION',
+        'description': 'Engajar visitantes e gerar interesse nos produtos',
+        'content': 'Páginas de produto, reviews, comparações, wishlist',
+        'channels': 'Email marketing, push notifications, remarketing',
+        'color': '#7ED321'
+    }),
+    MappingProxyType({
+        'name': 'COMPRA - PURCHASE',
+        'description': 'Converter visitantes em compradores',
+        'content': 'Checkout otimizado, ofertas especiais, urgência',
+        'channels': 'Carrinho abandonado, cupons, frete grátis',
+        'color': '#F5A623'
+    }),
+    MappingProxyType({
+        'name': 'RETENÇÃO - LOYALTY',
+        'description': 'Fidelizar clientes e gerar recompras',
+        'content': 'Programa de fidelidade, upsell, cross-sell',
+        'channels': 'Email pós-venda, SMS, programa VIP',
+        'color': '#D0021B'
+    })
+)
+
+# Palavra-chave do segmento -> estágios (ordem de inserção = prioridade)
+_SEGMENT_TEMPLATES: Dict[str, Tuple[Mapping[str, str], ...]] = {
+    'marketing': _MARKETING_FUNNEL_STAGES,
+    'digital': _MARKETING_FUNNEL_STAGES,
+    'ecommerce': _ECOMMERCE_FUNNEL_STAGES,
+    'loja': _ECOMMERCE_FUNNEL_STAGES
+}
+
+class SalesFunnelChartGenerator:
+    """
+    Sistema para gerar gráficos de funil de vendas usando IA
+    """
+    
+    # Configurações padrão do funil (compartilhadas entre instâncias)
+    DEFAULT_STAGES: ClassVar[Tuple[Mapping[str, str], ...]] = _DEFAULT_FUNNEL_STAGES
+    
+    def __init__(self):
+        self.gemini_api_key = os.getenv('GOOGLE_API_KEY')
+        self.openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
+        self.session = None
+        
+        # Redimensionamento: BILINEAR por padrão (1024 -> 1080 é visualmente equivalente e bem
+        # mais rápido); FUNNEL_HIGH_QUALITY_RESIZE=1 mantém o LANCZOS
+        self.resize_filter = (
+            Image.Resampling.LANCZOS if os.getenv('FUNNEL_HIGH_QUALITY_RESIZE') == '1'
+            else Image.Resampling.BILINEAR
+        )
+        
+    async def __aenter__(self):
+        """Context manager entry"""
+        self.session = await _get_session()
+        return self
+        
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit (a sessão compartilhada continua aberta para reuso)"""
+        self.session = None
+    
+    def _create_funnel_prompt(self, funnel_data: Dict[str, Any]) -> str:
         """
-        Gera gráfico usando Gemini Direct API
+        Cria prompt detalhado para geração de gráfico de funil (cacheado por assinatura dos estágios)
         """
-        if not self.gemini_api_key:
-            logger.warning("Google API Key não encontrada")
-            return None
-            
-        try:
-            logger.info("🎨 Gerando gráfico de funil com Gemini Direct")
-            
-            # Usando Google AI Generative API
-            import google.generativeai as genai
-            
-            genai.configure(api_key=self.gemini_api_key)
-            
-            # Como o Gemini não gera imagens diretamente, vamos criar um prompt aprimorado
-            enhanced_prompt = f"""
-            Professional sales funnel infographic for business presentation:
-            
-            {prompt}
-            
-            Additional requirements:
-            - Ultra-high quality business infographic
-            - Perfect for PowerPoint or business presentations
-            - Clean, professional design
-            - Optimized for digital display
-            - Corporate visual identity
-            - Data visualization best practices
-            - Accessible color contrast
-            - Scalable vector-style appearance
-            """
-            
-            logger.info("✅ Prompt aprimorado com Gemini Direct")
-            return None  # Retorna None para usar OpenRouter com prompt melhorado
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao gerar gráfico com Gemini Direct: {e}")
-            return None
+        stages = funnel_data.get('stages', self.DEFAULT_STAGES)
+        
+        # Assinatura: apenas os campos usados no prompt
+        signature = tuple(
+            (stage['name'], stage['description'], stage['content'][:200], stage.get('color', '#4A90E2'))
+            for stage in stages
+        )
+        return _build_funnel_prompt(signature)
     
     async def _generate_with_openrouter(self, prompt: str) -> Optional[str]:
         """
-        Gera gráfico usando OpenRouter com múltiplos modelos
+        Gera gráfico usando OpenRouter com múltiplos modelos (em paralelo, primeiro sucesso vence)
         """
         if not self.openrouter_api_key:
             logger.warning("OpenRouter API Key não encontrada")
             return None
-            
-        # Lista de modelos para tentar
-        models = [
-            "openai/dall-e-3",
-            "openai/dall-e-2",
-            "stability-ai/stable-diffusion-xl"
+        
+        tasks = [
+            asyncio.create_task(self._try_openrouter_model(model, prompt))
+            for model in OPENROUTER_IMAGE_MODELS
         ]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                image_base64 = await next_result
+                if image_base64:
+                    return image_base64
+        finally:
+            # Cancela os modelos que ainda não responderam
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
         
-        for model in models:
-            try:
+        logger.error("❌ Todos os modelos OpenRouter falharam")
+        return None
+    
+    async def _try_openrouter_model(self, model: str, prompt: str) -> Optional[str]:
+        """
+        Tenta gerar o gráfico com um modelo OpenRouter; retorna None se falhar ou se o modelo
+        estiver com o circuit breaker aberto
+        """
+        if _model_circuit_open(model):
+            logger.info(f"⏭️ Modelo {model} ignorado: falhas recentes consecutivas")
+            return None
+        
+        # Cancelamento (outro modelo venceu) propaga sem contar como falha
+        image_base64 = await self._request_openrouter_model(model, prompt)
+        _record_model_result(model, image_base64 is not None)
+        return image_base64
+    
+    async def _request_openrouter_model(self, model: str, prompt: str) -> Optional[str]:
+        """
+        Faz a chamada ao OpenRouter para um modelo; retorna None se falhar
+        """
+        try:
+            async with _get_openrouter_semaphore():
                 logger.info(f"🎨 Tentando gerar gráfico com OpenRouter usando {model}...")
                 
                 headers = {
@@ -199,14 +570,15 @@ class SalesFunnelChartGenerator:
                     }
                     endpoint = "https://openrouter.ai/api/v1/chat/completions"
                 
-                async with self.session.post(
+                session = await _get_session()
+                async with session.post(
                     endpoint,
                     headers=headers,
                     json=payload,
                     timeout=90
                 ) as response:
                     if response.status == 200:
-                        result = await response.json()
+                        result = _json_loads(await response.read())
                         
                         if "dall-e" in model and result.get('data'):
                             image_url = result['data'][0].get('url')
@@ -217,13 +589,10 @@ class SalesFunnelChartGenerator:
                     else:
                         error_text = await response.text()
                         logger.warning(f"⚠️ Modelo {model} falhou: {response.status} - {error_text}")
-                        continue
                         
-            except Exception as e:
-                logger.warning(f"⚠️ Erro com modelo {model}: {e}")
-                continue
+        except Exception as e:
+            logger.warning(f"⚠️ Erro com modelo {model}: {e}")
         
-        logger.error("❌ Todos os modelos OpenRouter falharam")
         return None
     
     async def _download_and_convert_base64(self, image_url: str) -> Optional[str]:
@@ -231,19 +600,13 @@ class SalesFunnelChartGenerator:
         Baixa imagem da URL e converte para base64
         """
         try:
-            async with self.session.get(image_url) as response:
+            session = await _get_session()
+            async with session.get(image_url) as response:
                 if response.status == 200:
-                    image_data = await response.read()
-                    
-                    # Redimensiona para 1080x1080 se necessário
-                    image = Image.open(io.BytesIO(image_data))
-                    if image.size != (1080, 1080):
-                        image = image.resize((1080, 1080), Image.Resampling.LANCZOS)
+                    image_data = await self._read_response_body(response)
                     
-                    # Converte para base64
-                    buffer = io.BytesIO()
-                    image.save(buffer, format='PNG')
-                    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+                    # Decodificação/redimensionamento/PNG são CPU-bound: fora do event loop
+                    image_base64 = await asyncio.to_thread(self._sync_resize_and_encode, image_data)
                     
                     logger.info(f"✅ Gráfico convertido para base64: {len(image_base64)} caracteres")
                     return image_base64
@@ -252,84 +615,59 @@ class SalesFunnelChartGenerator:
             logger.error(f"❌ Erro ao baixar e converter gráfico: {e}")
             return None
     
+    def _sync_resize_and_encode(self, image_data: bytes) -> str:
+        """
+        Redimensiona a imagem para 1080x1080 (se necessário) e converte para base64 (síncrono)
+        """
+        image = Image.open(io.BytesIO(image_data))
+        if image.size != (1080, 1080):
+            image = image.resize((1080, 1080), self.resize_filter)
+        
+        # Converte para base64
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        return base64.b64encode(buffer.getbuffer()).decode('ascii')
+    
+    async def _read_response_body(self, response: aiohttp.ClientResponse) -> bytearray:
+        """
+        Lê o corpo da resposta em blocos para um buffer pré-dimensionado pelo Content-Length
+        (uma única alocação em vez de buffers crescendo e um join final)
+        """
+        try:
+            expected_size = int(response.headers.get('Content-Length') or 0)
+        except ValueError:
+            expected_size = 0
+        
+        body = bytearray(expected_size)
+        size = 0
+        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+            end = size + len(chunk)
+            if end <= len(body):
+                body[size:end] = chunk
+            else:
+                # Content-Length ausente ou menor que o corpo (ex.: conteúdo descomprimido)
+                del body[size:]
+                body += chunk
+            size = end
+        
+        del body[size:]
+        return body
+    
     def _generate_fallback_funnel(self, funnel_data: Dict[str, Any]) -> str:
         """
-        Gera gráfico de funil de fallback usando matplotlib
+        Gera gráfico de funil de fallback usando matplotlib (cacheado por assinatura dos estágios)
         """
         try:
             logger.info("🎨 Gerando gráfico de funil de fallback com matplotlib...")
             
-            stages = funnel_data.get('stages', self.default_funnel_stages)
-            
-            # Configuração da figura
-            fig, ax = plt.subplots(figsize=(12, 12))
-            fig.patch.set_facecolor('white')
-            
-            # Configurações do funil
-            funnel_width = 8
-            funnel_height = 10
-            stage_height = funnel_height / len(stages)
-            
-            # Cores padrão se não especificadas
-            default_colors = ['#4A90E2', '#7ED321', '#F5A623', '#D0021B', '#9013FE']
-            
-            # Desenha cada estágio do funil
-            for i, stage in enumerate(stages):
-                # Calcula largura do estágio (diminui conforme desce)
-                width_ratio = 1 - (i * 0.3 / len(stages))
-                stage_width = funnel_width * width_ratio
-                
-                # Posição do estágio
-                x = (funnel_width - stage_width) / 2
-                y = funnel_height - (i + 1) * stage_height
-                
-                # Cor do estágio
-                color = stage.get('color', default_colors[i % len(default_colors)])
-                
-                # Desenha retângulo do estágio
-                rect = patches.Rectangle(
-                    (x, y), stage_width, stage_height,
-                    linewidth=2, edgecolor='white', facecolor=color, alpha=0.8
-                )
-                ax.add_patch(rect)
-                
-                # Adiciona texto do estágio
-                stage_name = stage['name'].split('(')[0].strip()  # Pega só o nome principal
-                ax.text(
-                    funnel_width / 2, y + stage_height / 2,
-                    stage_name,
-                    ha='center', va='center',
-                    fontsize=14, fontweight='bold',
-                    color='white', wrap=True
-                )
-                
-                # Adiciona setas entre estágios
-                if i < len(stages) - 1:
-                    arrow_y = y - 0.2
-                    ax.annotate('', xy=(funnel_width/2, arrow_y - 0.3), 
-                               xytext=(funnel_width/2, arrow_y),
-                               arrowprops=dict(arrowstyle='->', lw=3, color='#333333'))
-            
-            # Título
-            ax.text(funnel_width / 2, funnel_height + 0.5, 'FUNIL DE VENDAS',
-                   ha='center', va='center', fontsize=24, fontweight='bold',
-                   color='#333333')
+            stages = funnel_data.get('stages', self.DEFAULT_STAGES)
             
-            # Configurações do gráfico
-            ax.set_xlim(0, funnel_width)
-            ax.set_ylim(0, funnel_height + 1)
-            ax.set_aspect('equal')
-            ax.axis('off')
-            
-            # Salva em buffer
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='PNG', dpi=150, bbox_inches='tight',
-                       facecolor='white', edgecolor='none')
-            plt.close()
-            
-            # Converte para base64
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+            # Assinatura: nome e cor efetiva de cada estágio (únicos dados desenhados)
+            signature = tuple(
+                (stage['name'], stage.get('color', DEFAULT_STAGE_COLORS[i % len(DEFAULT_STAGE_COLORS)]))
+                for i, stage in enumerate(stages)
+            )
+            image_base64 = _render_fallback_cached(signature)
             
             logger.info(f"✅ Gráfico de fallback gerado: {len(image_base64)} caracteres")
             return image_base64
@@ -338,66 +676,19 @@ class SalesFunnelChartGenerator:
             logger.error(f"❌ Erro ao gerar gráfico de fallback: {e}")
             return self._generate_minimal_funnel()
     
+    async def _generate_fallback_funnel_async(self, funnel_data: Dict[str, Any]) -> str:
+        """
+        Versão assíncrona do fallback: renderiza em uma thread para não bloquear o event loop
+        """
+        return await asyncio.to_thread(self._generate_fallback_funnel, funnel_data)
+    
     def _generate_minimal_funnel(self) -> str:
         """
         Gera gráfico mínimo em caso de erro total
         """
         try:
             logger.info("🎨 Gerando gráfico mínimo de emergência...")
-            
-            # Cria imagem simples 1080x1080
-            img = Image.new('RGB', (1080, 1080), color='#f8f9fa')
-            draw = ImageDraw.Draw(img)
-            
-            # Tenta carregar fonte
-            try:
-                font_title = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 60)
-                font_text = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 30)
-            except:
-                font_title = ImageFont.load_default()
-                font_text = ImageFont.load_default()
-            
-            # Desenha título
-            title = "FUNIL DE VENDAS"
-            bbox = draw.textbbox((0, 0), title, font=font_title)
-            text_width = bbox[2] - bbox[0]
-            text_x = 540 - text_width // 2
-            draw.text((text_x, 100), title, fill='#333333', font=font_title)
-            
-            # Desenha estágios do funil
-            stages = ["TOPO - ATRAÇÃO", "MEIO - CONSIDERAÇÃO", "FUNDO - AÇÃO"]
-            colors = ['#4A90E2', '#7ED321', '#F5A623']
-            
-            for i, (stage, color) in enumerate(zip(stages, colors)):
-                # Calcula posição e tamanho
-                y = 250 + i * 200
-                width = 600 - i * 150
-                x = 540 - width // 2
-                height = 120
-                
-                # Desenha retângulo
-                draw.rectangle([x, y, x + width, y + height], fill=color, outline='white', width=3)
-                
-                # Desenha texto
-                bbox = draw.textbbox((0, 0), stage, font=font_text)
-                text_width = bbox[2] - bbox[0]
-                text_x = 540 - text_width // 2
-                text_y = y + height // 2 - 15
-                draw.text((text_x, text_y), stage, fill='white', font=font_text)
-                
-                # Desenha seta
-                if i < len(stages) - 1:
-                    arrow_y = y + height + 20
-                    draw.polygon([
-                        (540 - 20, arrow_y),
-                        (540 + 20, arrow_y),
-                        (540, arrow_y + 40)
-                    ], fill='#666666')
-            
-            # Converte para base64
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            return base64.b64encode(buffer.getvalue()).decode('utf-8')
+            return _render_minimal_funnel()
             
         except Exception as e:
             logger.error(f"❌ Erro crítico ao gerar gráfico mínimo: {e}")
@@ -413,18 +704,13 @@ class SalesFunnelChartGenerator:
         prompt = self._create_funnel_prompt(funnel_data)
         logger.info(f"📝 Prompt criado: {prompt[:200]}...")
         
-        # Tenta gerar com Gemini Direct primeiro
-        image_base64 = await self._generate_with_gemini_direct(prompt)
-        
-        if not image_base64:
-            logger.info("🔄 Gemini não disponível, tentando OpenRouter...")
-            # Fallback para OpenRouter
-            image_base64 = await self._generate_with_openrouter(prompt)
+        # Gera com OpenRouter (Gemini não gera imagens diretamente)
+        image_base64 = await self._generate_with_openrouter(prompt)
         
         if not image_base64:
             logger.info("🔄 APIs não disponíveis, gerando gráfico de fallback...")
             # Fallback para geração local
-            image_base64 = self._generate_fallback_funnel(funnel_data)
+            image_base64 = await self._generate_fallback_funnel_async(funnel_data)
         
         if image_base64:
             resultado = {
@@ -433,7 +719,7 @@ class SalesFunnelChartGenerator:
                 'chart_data_url': f'data:image/png;base64,{image_base64}',
                 'size': '1080x1080',
                 'format': 'PNG',
-                'funnel_stages': len(funnel_data.get('stages', self.default_funnel_stages)),
+                'funnel_stages': len(funnel_data.get('stages', self.DEFAULT_STAGES)),
                 'generated_at': datetime.now().isoformat(),
                 'method': 'ai_generated' if image_base64 else 'fallback'
             }
@@ -454,65 +740,15 @@ class SalesFunnelChartGenerator:
         """
         logger.info(f"🎯 Criando funil customizado para: {segment}")
         
-        # Mapeia segmentos para estágios específicos
-        if 'marketing' in segment.lower() or 'digital' in segment.lower():
-            stages = [
-                {
-                    'name': 'TOPO DO FUNIL - AWARENESS',
-                    'description': 'Atrair leads qualificados através de conteúdo relevante',
-                    'content': 'Blog posts, SEO, redes sociais, webinars, e-books gratuitos',
-                    'channels': 'Google Ads, Facebook Ads, LinkedIn, YouTube',
-                    'color': '#4A90E2'
-                },
-                {
-                    'name': 'MEIO DO FUNIL - CONSIDERATION',
-                    'description': 'Nutrir leads e demonstrar valor da solução',
-                    'content': 'Email marketing, demos, cases de sucesso, trials gratuitos',
-                    'channels': 'Email sequences, retargeting, inside sales',
-                    'color': '#7ED321'
-                },
-                {
-                    'name': 'FUNDO DO FUNIL - DECISION',
-                    'description': 'Converter leads em clientes pagantes',
-                    'content': 'Propostas personalizadas, negociação, fechamento',
-                    'channels': 'Sales calls, contratos, onboarding',
-                    'color': '#F5A623'
-                }
-            ]
-        elif 'ecommerce' in segment.lower() or 'loja' in segment.lower():
-            stages = [
-                {
-                    'name': 'DESCOBERTA - AWARENESS',
-                    'description': 'Atrair visitantes para a loja online',
-                    'content': 'SEO, anúncios pagos, influenciadores, conteúdo viral',
-                    'channels': 'Google Shopping, Facebook Ads, Instagram, TikTok',
-                    'color': '#4A90E2'
-                },
-                {
-                    'name': 'INTERESSE - CONSIDERATION',
-                    'description': 'Engajar visitantes e gerar interesse nos produtos',
-                    'content': 'Páginas de produto, reviews, comparações, wishlist',
-                    'channels': 'Email marketing, push notifications, remarketing',
-                    'color': '#7ED321'
-                },
-                {
-                    'name': 'COMPRA - PURCHASE',
-                    'description': 'Converter visitantes em compradores',
-                    'content': 'Checkout otimizado, ofertas especiais, urgência',
-                    'channels': 'Carrinho abandonado, cupons, frete grátis',
-                    'color': '#F5A623'
-                },
-                {
-                    'name': 'RETENÇÃO - LOYALTY',
-                    'description': 'Fidelizar clientes e gerar recompras',
-                    'content': 'Programa de fidelidade, upsell, cross-sell',
-                    'channels': 'Email pós-venda, SMS, programa VIP',
-                    'color': '#D0021B'
-                }
-            ]
-        else:
-            # Funil genérico para outros segmentos
-            stages = self.default_funnel_stages
+        # Mapeia segmentos para estágios específicos (um único lower() e a primeira palavra-chave
+        # encontrada, na ordem de prioridade); funil genérico para outros segmentos
+        segment_lower = segment.lower()
+        template = next(
+            (stages for keyword, stages in _SEGMENT_TEMPLATES.items() if keyword in segment_lower),
+            self.DEFAULT_STAGES
+        )
+        # Cópia mutável dos estágios compartilhados
+        stages = [dict(stage) for stage in template]
         
         return {
             'segment': segment,
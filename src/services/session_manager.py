@@ -7,32 +7,447 @@ Sistema para salvar e continuar análises de onde pararam
 
 import os
 import json
+import logging
 import pickle
+import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+# orjson opcional (serialização/parse em C); fallback para o json padrão
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# msgpack opcional: formato binário (menor e mais rápido) para os snapshots das sessões
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+# ijson opcional: parse incremental dos snapshots JSON ao listar sessões
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+# zstandard opcional: compressão dos snapshots (chaves repetidas e textos longos comprimem bem)
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# io_uring opcional (somente Linux, via binding liburing)
+try:
+    import liburing
+    HAS_LIBURING = platform.system() == 'Linux'
+except ImportError:
+    HAS_LIBURING = False
+
+# Offset -1 (em u64) no io_uring: usa e avança a posição atual do arquivo, como o os.write
+URING_CURRENT_POSITION = (1 << 64) - 1
+
+class _UringFileWriter:
+    """
+    Grava um buffer e faz o fsync do arquivo com uma única submissão io_uring
+    (write encadeado ao fsync via IOSQE_IO_LINK)
+    """
+    
+    def __init__(self):
+        self.ring = liburing.Ring()
+        self.cqe = liburing.Cqe()
+        liburing.io_uring_queue_init(8, self.ring)
+        self.lock = threading.Lock()
+    
+    @classmethod
+    def create(cls) -> Optional['_UringFileWriter']:
+        """Cria o escritor se io_uring estiver disponível; caso contrário retorna None"""
+        if not HAS_LIBURING:
+            return None
+        try:
+            return cls()
+        except Exception as e:
+            logger.warning("⚠️ io_uring indisponível, usando escrita padrão: %s", e)
+            return None
+    
+    def write_and_fsync(self, fd: int, data: bytes) -> int:
+        """
+        Retorna quantos bytes foram escritos; em escrita parcial a cadeia é interrompida
+        (o fsync é cancelado) e o chamador completa o restante
+        """
+        with self.lock:
+            sqe = liburing.io_uring_get_sqe(self.ring)
+            liburing.io_uring_prep_write(sqe, fd, data, URING_CURRENT_POSITION)
+            liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK)
+            liburing.io_uring_sqe_set_data64(sqe, 0)
+            sqe = liburing.io_uring_get_sqe(self.ring)
+            liburing.io_uring_prep_fsync(sqe, fd)
+            liburing.io_uring_sqe_set_data64(sqe, 1)
+            liburing.io_uring_submit_and_wait(self.ring, 2)
+            
+            written = 0
+            write_error = None
+            fsync_error = None
+            for _ in range(2):
+                liburing.io_uring_wait_cqe(self.ring, self.cqe)
+                cqe = self.cqe[0]
+                try:
+                    if cqe.user_data == 0:
+                        written = cqe.res
+                    else:
+                        cqe.res
+                except OSError as e:
+                    if cqe.user_data == 0:
+                        write_error = e
+                    else:
+                        fsync_error = e
+                finally:
+                    liburing.io_uring_cqe_seen(self.ring, cqe)
+        
+        if write_error is not None:
+            raise write_error
+        if fsync_error is not None and written == len(data):
+            raise fsync_error
+        return written
+
+_URING_WRITER: Optional[_UringFileWriter] = None
+_URING_WRITER_CHECKED = False
+
+def _get_uring_writer() -> Optional[_UringFileWriter]:
+    """Escritor io_uring compartilhado, criado na primeira gravação de snapshot"""
+    global _URING_WRITER, _URING_WRITER_CHECKED
+    if not _URING_WRITER_CHECKED:
+        _URING_WRITER_CHECKED = True
+        _URING_WRITER = _UringFileWriter.create()
+    return _URING_WRITER
+
+def _dump_session_json(data: Dict[str, Any], pretty: bool = False) -> bytes:
+    """Serializa os dados da sessão em JSON UTF-8 compacto (indentado com pretty=True)"""
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, option=option)
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def _load_session_json(raw: bytes) -> Dict[str, Any]:
+    """Parseia os bytes de um arquivo de sessão"""
+    if HAS_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+def _write_file_atomic(path: Path, data: bytes):
+    """
+    Grava o arquivo inteiro com um único os.write (repetido só em escrita parcial) em um
+    temporário, faz fsync e o renomeia sobre o destino: leitores nunca veem arquivo truncado
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            view = memoryview(data)
+            synced = False
+            
+            # io_uring: write + fsync encadeados em uma única transição para o kernel
+            uring_writer = _get_uring_writer()
+            if uring_writer is not None:
+                written = uring_writer.write_and_fsync(fd, data)
+                synced = written == len(data)
+                view = view[written:]
+            
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            if not synced:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Falha antes do rename: o destino continua intacto; remove o temporário incompleto
+        tmp_path.unlink(missing_ok=True)
+        raise
+    
+    _fsync_directory(path.parent)
+
+def _fsync_directory(directory: Path):
+    """Persiste a entrada de diretório do rename (POSIX); ignorado onde não é suportado"""
+    if os.name != 'posix':
+        return
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+# Extensões de snapshot reconhecidas (a do formato configurado é a usada nas gravações);
+# '.zst' indica snapshot comprimido com zstd
+SESSION_SNAPSHOT_SUFFIXES = ('.msgpack.zst', '.json.zst', '.msgpack', '.json')
+
+# Nível de compressão zstd dos snapshots (rápido, ~5-10x em sessões com resultados textuais)
+SESSION_ZSTD_LEVEL = 3
+
+def _snapshot_suffix(session_file: Path) -> str:
+    """Extensão completa do snapshot (os IDs de sessão não contêm pontos)"""
+    return '.' + session_file.name.partition('.')[2]
+
+def _dump_snapshot(data: Dict[str, Any], suffix: str, pretty: bool = False) -> bytes:
+    """Serializa (e comprime, se '.zst') o snapshot no formato correspondente à extensão"""
+    base_suffix = suffix[:-4] if suffix.endswith('.zst') else suffix
+    if base_suffix == '.msgpack':
+        raw = msgpack.packb(data, use_bin_type=True)
+    else:
+        raw = _dump_session_json(data, pretty)
+    
+    if suffix.endswith('.zst'):
+        return zstandard.ZstdCompressor(level=SESSION_ZSTD_LEVEL).compress(raw)
+    return raw
+
+def _load_snapshot(raw: bytes, suffix: str) -> Dict[str, Any]:
+    """Descomprime (se '.zst') e desserializa um snapshot conforme a extensão do arquivo"""
+    if suffix.endswith('.zst'):
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+        suffix = suffix[:-4]
+    
+    if suffix == '.msgpack':
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    return _load_session_json(raw)
+
+# Índice com o resumo de cada sessão, usado por list_sessions (validado pelo stat dos arquivos)
+SESSION_INDEX_FILE = "index.json"
+
+# Máximo de erros mantidos por sessão (os mais antigos são descartados)
+SESSION_MAX_ERRORS = 500
+
+# Tamanho do log de alterações a partir do qual um novo snapshot é gravado e o log descartado
+SESSION_LOG_ROTATE_BYTES = 256 * 1024
+
+# Sufixo do diretório com os resultados de módulos de cada sessão (<session_id>.results)
+SESSION_RESULTS_DIR_SUFFIX = ".results"
+
+# Threads usadas por list_sessions para ler em paralelo as sessões alteradas
+SESSION_LIST_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+def _dump_log_entry(entry: Dict[str, Any]) -> bytes:
+    """Serializa uma alteração como uma linha JSONL compacta"""
+    if HAS_ORJSON:
+        return orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(entry, ensure_ascii=False).encode('utf-8') + b"\n"
+
+def _apply_session_op(data: Dict[str, Any], entry: Dict[str, Any]):
+    """Aplica uma alteração (op + payload) aos dados da sessão; usado ao vivo e no replay do log"""
+    op = entry['op']
+    payload = entry['payload']
+    
+    if op == 'module_completed':
+        module_name = payload['module']
+        if module_name not in data['completed_modules']:
+            data['completed_modules'].append(module_name)
+        
+        if 'result_file' in payload:
+            # Resultado em arquivo separado: a sessão guarda só a referência
+            data.setdefault('result_files', {})[module_name] = payload['result_file']
+            data['results'].pop(module_name, None)
+        elif 'result' in payload:
+            data['results'][module_name] = payload['result']
+        
+        # Atualiza progresso
+        completed = len(data['completed_modules'])
+        total = data['progress']['total_modules']
+        
+        data['progress']['completed'] = completed
+        data['progress']['percentage'] = (completed / total) * 100
+    elif op == 'current_module':
+        data['current_module'] = payload['module']
+        data['progress']['current_step'] = payload['step']
+    elif op == 'error':
+        errors = data['errors']
+        errors.append(payload)
+        if len(errors) > SESSION_MAX_ERRORS:
+            del errors[:len(errors) - SESSION_MAX_ERRORS]
+    elif op == 'status':
+        data['status'] = payload['status']
+    
+    data['updated_at'] = entry['ts']
+
+def _replay_session_log(data: Dict[str, Any], log_file: Optional[Path]) -> Dict[str, Any]:
+    """Reaplica aos dados as alterações do log JSONL da sessão, se existir (None: sabidamente ausente)"""
+    if log_file is None:
+        return data
+    
+    try:
+        with open(log_file, 'rb') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return data
+    
+    for line in lines:
+        try:
+            entry = _load_session_json(line)
+        except ValueError:
+            # Última linha incompleta (gravação interrompida): ignora o restante
+            break
+        _apply_session_op(data, entry)
+    
+    return data
+
+def _read_session_files(session_file: Path, log_file: Optional[Path]) -> Dict[str, Any]:
+    """Lê o snapshot da sessão e reaplica as alterações do log JSONL, se existir"""
+    with open(session_file, 'rb') as f:
+        data = _load_snapshot(f.read(), _snapshot_suffix(session_file))
+    return _replay_session_log(data, log_file)
+
+# Campos de topo usados no resumo de list_sessions (gravados antes dos dados volumosos)
+SESSION_SUMMARY_KEYS = frozenset({
+    'session_id', 'created_at', 'updated_at', 'status', 'progress', 'completed_modules'
+})
+
+def _read_session_summary(session_file: Path, log_file: Optional[Path]) -> Dict[str, Any]:
+    """
+    Lê apenas os campos de resumo da sessão: em snapshots JSON (com ijson) o parse para assim
+    que eles são encontrados, sem materializar analysis_data/results; depois reaplica o log
+    """
+    if _snapshot_suffix(session_file) != '.json' or not HAS_IJSON:
+        return _read_session_files(session_file, log_file)
+    
+    data = {}
+    with open(session_file, 'rb') as f:
+        for key, value in ijson.kvitems(f, '', use_float=True):
+            if key in SESSION_SUMMARY_KEYS:
+                data[key] = value
+                if len(data) == len(SESSION_SUMMARY_KEYS):
+                    break
+    
+    # Estruturas mínimas para o replay das alterações
+    data.setdefault('completed_modules', [])
+    data.setdefault('progress', {'total_modules': 12})
+    data['results'] = {}
+    data['errors'] = []
+    return _replay_session_log(data, log_file)
+
 class SessionManager:
     """Gerenciador de sessões para continuar análises"""
     
-    def __init__(self, session_dir: str = "sessions"):
+    # Módulos da análise, na ordem de execução
+    _ALL_MODULES = (
+        'avatar_generation',
+        'competitor_analysis',
+        'funnel_generation',
+        'keyword_research',
+        'content_strategy',
+        'market_analysis',
+        'persona_development',
+        'pricing_strategy',
+        'distribution_channels',
+        'risk_assessment',
+        'financial_projections',
+        'final_report'
+    )
+    
+    def __init__(self, session_dir: str = "sessions", snapshot_format: Optional[str] = None,
+                 compress: Optional[bool] = None, pretty: Optional[bool] = None):
         self.session_dir = Path(session_dir)
         self.session_dir.mkdir(exist_ok=True)
         self.current_session_id = None
         self.current_session_data = {}
         
+        # Espelho de current_session_data['completed_modules'] para consultas O(1)
+        self._completed_set = set()
+        
+        # Resultados de módulos já lidos dos arquivos separados (ou gravados neste processo)
+        self._results_cache: Dict[str, Any] = {}
+        
+        # Formato dos snapshots: msgpack quando disponível; JSON legível com snapshot_format='json'
+        # ou SESSION_JSON_DEBUG=1. Snapshots no outro formato continuam sendo lidos.
+        if snapshot_format is None:
+            snapshot_format = 'json' if os.getenv('SESSION_JSON_DEBUG') == '1' else 'msgpack'
+        if snapshot_format == 'msgpack' and not HAS_MSGPACK:
+            snapshot_format = 'json'
+        self.snapshot_suffix = '.msgpack' if snapshot_format == 'msgpack' else '.json'
+        
+        # Compressão zstd dos snapshots: ativa quando disponível, exceto no modo de depuração
+        # JSON ou com SESSION_COMPRESS=0
+        if compress is None:
+            compress = os.getenv('SESSION_JSON_DEBUG') != '1' and os.getenv('SESSION_COMPRESS') != '0'
+        if compress and HAS_ZSTD:
+            self.snapshot_suffix += '.zst'
+        
+        # Snapshots JSON compactos; indentados apenas para inspeção manual (pretty=True ou
+        # SESSION_JSON_DEBUG=1)
+        if pretty is None:
+            pretty = os.getenv('SESSION_JSON_DEBUG') == '1'
+        self.pretty = pretty
+        
+        # Log de alterações (append-only) da sessão atual e linhas ainda não gravadas;
+        # dentro de buffered() as linhas são acumuladas e gravadas de uma vez ao sair
+        self._log_file = None
+        self._pending_log: List[bytes] = []
+        self._buffer_depth = 0
+        
+    def _session_paths(self, session_id: str):
+        """Retorna (snapshot no formato configurado, log JSONL) da sessão"""
+        return (
+            self.session_dir / f"{session_id}{self.snapshot_suffix}",
+            self.session_dir / f"{session_id}.log"
+        )
+    
+    def _results_dir(self, session_id: str) -> Path:
+        """
+        Diretório com os resultados de módulos da sessão (um arquivo por módulo)
+        
+        Não usa sessions/<session_id>/, onde outros serviços gravam relatórios, CPLs e imagens.
+        """
+        return self.session_dir / f"{session_id}{SESSION_RESULTS_DIR_SUFFIX}"
+    
+    def _find_snapshot(self, session_id: str) -> Optional[Path]:
+        """Localiza o snapshot existente da sessão, priorizando o formato configurado"""
+        suffixes = (self.snapshot_suffix,) + tuple(
+            suffix for suffix in SESSION_SNAPSHOT_SUFFIXES if suffix != self.snapshot_suffix
+        )
+        for suffix in suffixes:
+            session_file = self.session_dir / f"{session_id}{suffix}"
+            if session_file.exists():
+                return session_file
+        return None
+    
+    def _close_log(self):
+        """Fecha o log da sessão atual e descarta alterações não gravadas (já incluídas no snapshot)"""
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        self._pending_log.clear()
+        
     def create_session(self, analysis_data: Dict[str, Any]) -> str:
         """Cria nova sessão"""
-        session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Um único relógio para o ID e os timestamps iniciais
+        now = datetime.now()
+        timestamp = now.isoformat()
+        session_id = f"session_{now.strftime('%Y%m%d_%H%M%S')}"
+        self._flush_log()
+        self._close_log()
         self.current_session_id = session_id
         
         # Dados iniciais da sessão
         self.current_session_data = {
             'session_id': session_id,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
+            'created_at': timestamp,
+            'updated_at': timestamp,
             'status': 'iniciada',
-            'analysis_data': analysis_data,
             'completed_modules': [],
             'current_module': None,
             'progress': {
@@ -41,94 +456,159 @@ class SessionManager:
                 'current_step': 0,
                 'percentage': 0.0
             },
+            # Dados volumosos por último: o resumo de list_sessions é lido antes deles
+            'analysis_data': analysis_data,
             'results': {},
+            'result_files': {},
             'errors': []
         }
+        self._completed_set = set()
+        self._results_cache = {}
         
         self.save_session()
         return session_id
     
     def load_session(self, session_id: str) -> bool:
         """Carrega sessão existente"""
-        session_file = self.session_dir / f"{session_id}.json"
+        _, log_file = self._session_paths(session_id)
+        session_file = self._find_snapshot(session_id)
         
-        if not session_file.exists():
+        if session_file is None:
             return False
             
         try:
-            with open(session_file, 'r', encoding='utf-8') as f:
-                self.current_session_data = json.load(f)
+            session_data = _read_session_files(session_file, log_file)
             
+            self._flush_log()
+            self._close_log()
+            self.current_session_data = session_data
             self.current_session_id = session_id
+            self._completed_set = set(session_data.get('completed_modules', []))
+            self._results_cache = {}
+            
+            # Compacta o log reaplicado (e descarta uma eventual linha incompleta no final,
+            # que corromperia as próximas linhas anexadas)
+            if log_file.exists():
+                self.save_session(touch=False)
             return True
         except Exception as e:
-            print(f"Erro ao carregar sessão {session_id}: {e}")
+            logger.error("Erro ao carregar sessão %s: %s", session_id, e)
             return False
     
-    def save_session(self):
-        """Salva sessão atual"""
+    def save_session(self, touch: bool = True):
+        """
+        Salva snapshot completo da sessão atual e descarta o log de alterações
+        
+        touch=False mantém o updated_at (compactação do log, sem alteração real da sessão).
+        """
         if not self.current_session_id:
             return False
             
-        session_file = self.session_dir / f"{self.current_session_id}.json"
+        session_file, log_file = self._session_paths(self.current_session_id)
         
         try:
-            self.current_session_data['updated_at'] = datetime.now().isoformat()
+            if touch:
+                self.current_session_data['updated_at'] = datetime.now().isoformat()
+            
+            _write_file_atomic(session_file, _dump_snapshot(self.current_session_data, self.snapshot_suffix, self.pretty))
             
-            with open(session_file, 'w', encoding='utf-8') as f:
-                json.dump(self.current_session_data, f, indent=2, ensure_ascii=False)
+            # Remove snapshot antigo em outro formato (migração ao regravar)
+            for suffix in SESSION_SNAPSHOT_SUFFIXES:
+                if suffix != self.snapshot_suffix:
+                    (self.session_dir / f"{self.current_session_id}{suffix}").unlink(missing_ok=True)
             
+            # O snapshot (já persistido) contém todas as alterações do log
+            self._close_log()
+            log_file.unlink(missing_ok=True)
             return True
         except Exception as e:
-            print(f"Erro ao salvar sessão: {e}")
+            logger.error("Erro ao salvar sessão: %s", e)
             return False
     
-    def mark_module_completed(self, module_name: str, result: Any = None):
-        """Marca módulo como concluído"""
-        if module_name not in self.current_session_data['completed_modules']:
-            self.current_session_data['completed_modules'].append(module_name)
+    @contextmanager
+    def buffered(self):
+        """Acumula as alterações da sessão e grava o log uma única vez ao sair do bloco"""
+        self._buffer_depth += 1
+        try:
+            yield self
+        finally:
+            self._buffer_depth -= 1
+            if self._buffer_depth == 0:
+                self._flush_log()
+    
+    def _record(self, op: str, payload: Dict[str, Any], timestamp: Optional[str] = None):
+        """
+        Aplica uma alteração à sessão atual e a registra no log (O(alteração), não O(sessão));
+        timestamp permite reaproveitar o horário já formatado pelo chamador
+        """
+        entry = {'op': op, 'ts': timestamp or datetime.now().isoformat(), 'payload': payload}
+        _apply_session_op(self.current_session_data, entry)
         
-        if result:
-            self.current_session_data['results'][module_name] = result
+        try:
+            self._pending_log.append(_dump_log_entry(entry))
+        except Exception as e:
+            logger.error("Erro ao salvar sessão: %s", e)
+            return False
         
-        # Atualiza progresso
-        completed = len(self.current_session_data['completed_modules'])
-        total = self.current_session_data['progress']['total_modules']
+        if self._buffer_depth > 0:
+            return True
+        return self._flush_log()
+    
+    def _flush_log(self):
+        """Grava as alterações pendentes no log; acima do limite, grava novo snapshot"""
+        if not self._pending_log or not self.current_session_id:
+            return True
         
-        self.current_session_data['progress']['completed'] = completed
-        self.current_session_data['progress']['percentage'] = (completed / total) * 100
+        try:
+            if self._log_file is None:
+                _, log_file = self._session_paths(self.current_session_id)
+                self._log_file = open(log_file, 'ab', buffering=0)
+            
+            self._log_file.write(b"".join(self._pending_log))
+            self._pending_log.clear()
+            
+            if self._log_file.tell() >= SESSION_LOG_ROTATE_BYTES:
+                # updated_at já vem da última alteração registrada
+                return self.save_session(touch=False)
+            return True
+        except Exception as e:
+            logger.error("Erro ao salvar sessão: %s", e)
+            return False
+    
+    def mark_module_completed(self, module_name: str, result: Any = None):
+        """
+        Marca módulo como concluído; o resultado é gravado em arquivo próprio e a sessão
+        registra apenas a referência (custo proporcional ao resultado, não à sessão)
+        """
+        payload = {'module': module_name}
+        if result:
+            result_file = f"{module_name}{self.snapshot_suffix}"
+            try:
+                results_dir = self._results_dir(self.current_session_id)
+                results_dir.mkdir(exist_ok=True)
+                _write_file_atomic(results_dir / result_file, _dump_snapshot(result, self.snapshot_suffix, self.pretty))
+                payload['result_file'] = result_file
+                self._results_cache[module_name] = result
+            except Exception as e:
+                # Sem o arquivo separado, o resultado segue embutido na sessão
+                logger.error("Erro ao salvar resultado do módulo %s: %s", module_name, e)
+                payload['result'] = result
         
-        self.save_session()
+        self._record('module_completed', payload)
+        self._completed_set.add(module_name)
     
     def set_current_module(self, module_name: str, step: int = 0):
         """Define módulo atual"""
-        self.current_session_data['current_module'] = module_name
-        self.current_session_data['progress']['current_step'] = step
-        self.save_session()
+        self._record('current_module', {'module': module_name, 'step': step})
     
     def is_module_completed(self, module_name: str) -> bool:
         """Verifica se módulo foi concluído"""
-        return module_name in self.current_session_data['completed_modules']
+        return module_name in self._completed_set
     
     def get_next_module(self) -> Optional[str]:
         """Retorna próximo módulo a ser executado"""
-        all_modules = [
-            'avatar_generation',
-            'competitor_analysis', 
-            'funnel_generation',
-            'keyword_research',
-            'content_strategy',
-            'market_analysis',
-            'persona_development',
-            'pricing_strategy',
-            'distribution_channels',
-            'risk_assessment',
-            'financial_projections',
-            'final_report'
-        ]
-        
-        for module in all_modules:
-            if not self.is_module_completed(module):
+        for module in self._ALL_MODULES:
+            if module not in self._completed_set:
                 return module
         
         return None
@@ -146,60 +626,177 @@ class SessionManager:
         return self.current_session_data
     
     def list_sessions(self) -> List[Dict[str, Any]]:
-        """Lista todas as sessões"""
+        """
+        Lista todas as sessões
+        
+        Os resumos ficam em um índice; só as sessões cujo snapshot ou log mudou desde a última
+        listagem (mtime/tamanho obtidos do scandir) são lidas e parseadas novamente.
+        """
+        index_file = self.session_dir / SESSION_INDEX_FILE
+        try:
+            with open(index_file, 'rb') as f:
+                index = _load_session_json(f.read())
+        except (OSError, ValueError):
+            index = {}
+        
+        snapshots = {}
+        logs = {}
+        with os.scandir(self.session_dir) as entries:
+            for entry in entries:
+                if not entry.name.startswith('session_'):
+                    continue
+                stem, _, extension = entry.name.partition('.')
+                suffix = '.' + extension
+                if suffix in SESSION_SNAPSHOT_SUFFIXES:
+                    # Com snapshots nos dois formatos (migração interrompida), vale o mais recente
+                    previous = snapshots.get(stem)
+                    if previous is None or entry.stat().st_mtime_ns > previous.stat().st_mtime_ns:
+                        snapshots[stem] = entry
+                elif suffix == '.log':
+                    logs[stem] = entry
+        
+        stamps = {}
+        stale = []
+        for session_id, entry in snapshots.items():
+            # stat() do DirEntry vem do próprio scandir (ou é feito uma única vez e cacheado)
+            snapshot_stat = entry.stat()
+            log_entry = logs.get(session_id)
+            log_stat = log_entry.stat() if log_entry else None
+            stamps[session_id] = [
+                snapshot_stat.st_mtime_ns, snapshot_stat.st_size,
+                log_stat.st_mtime_ns if log_stat else 0, log_stat.st_size if log_stat else 0
+            ]
+            
+            cached = index.get(session_id)
+            if not (isinstance(cached, dict) and cached.get('stamp') == stamps[session_id]):
+                # Sem log no diretório, o replay nem tenta abri-lo
+                stale.append((session_id, Path(entry.path), Path(log_entry.path) if log_entry else None))
+        
+        # Sessões alteradas são lidas em paralelo (leituras de disco independentes)
+        fresh = {}
+        if len(stale) > 1:
+            workers = min(SESSION_LIST_MAX_WORKERS, len(stale))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                summaries = executor.map(lambda item: self._summarize_session_file(*item[1:]), stale)
+                fresh = {item[0]: summary for item, summary in zip(stale, summaries)}
+        elif stale:
+            session_id, session_file, log_file = stale[0]
+            fresh[session_id] = self._summarize_session_file(session_file, log_file)
+        
         sessions = []
+        new_index = {}
+        for session_id, stamp in stamps.items():
+            if session_id in fresh:
+                summary = fresh[session_id]
+                if summary is None:
+                    continue
+            else:
+                summary = index[session_id]['summary']
+            
+            new_index[session_id] = {'stamp': stamp, 'summary': summary}
+            sessions.append(summary)
         
-        for session_file in self.session_dir.glob("session_*.json"):
+        # Regrava o índice apenas se algo mudou (sessões novas, alteradas ou removidas)
+        if new_index != index:
             try:
-                with open(session_file, 'r', encoding='utf-8') as f:
-                    session_data = json.load(f)
-                
-                sessions.append({
-                    'session_id': session_data.get('session_id'),
-                    'created_at': session_data.get('created_at'),
-                    'updated_at': session_data.get('updated_at'),
-                    'status': session_data.get('status'),
-                    'progress': session_data.get('progress', {}),
-                    'completed_modules': len(session_data.get('completed_modules', [])),
-                    'total_modules': session_data.get('progress', {}).get('total_modules', 12)
-                })
+                _write_file_atomic(index_file, _dump_session_json(new_index))
             except Exception as e:
-                print(f"Erro ao ler sessão {session_file}: {e}")
+                logger.error("Erro ao salvar índice de sessões: %s", e)
         
         return sorted(sessions, key=lambda x: x['updated_at'], reverse=True)
     
+    def _summarize_session_file(self, session_file: Path, log_file: Optional[Path]) -> Optional[Dict[str, Any]]:
+        """Lê uma sessão do disco e monta o resumo usado por list_sessions (None em caso de erro)"""
+        try:
+            session_data = _read_session_summary(session_file, log_file)
+        except Exception as e:
+            logger.error("Erro ao ler sessão %s: %s", session_file, e)
+            return None
+        
+        return {
+            'session_id': session_data.get('session_id'),
+            'created_at': session_data.get('created_at'),
+            'updated_at': session_data.get('updated_at'),
+            'status': session_data.get('status'),
+            'progress': session_data.get('progress', {}),
+            'completed_modules': len(session_data.get('completed_modules', [])),
+            'total_modules': session_data.get('progress', {}).get('total_modules', 12)
+        }
+    
     def delete_session(self, session_id: str) -> bool:
         """Deleta sessão"""
-        session_file = self.session_dir / f"{session_id}.json"
+        _, log_file = self._session_paths(session_id)
         
         try:
-            if session_file.exists():
-                session_file.unlink()
+            if session_id == self.current_session_id:
+                self._close_log()
+            log_file.unlink(missing_ok=True)
+            self._delete_results(session_id)
+            
+            deleted = False
+            for suffix in SESSION_SNAPSHOT_SUFFIXES:
+                session_file = self.session_dir / f"{session_id}{suffix}"
+                if session_file.exists():
+                    session_file.unlink()
+                    deleted = True
+            if deleted:
                 return True
         except Exception as e:
-            print(f"Erro ao deletar sessão {session_id}: {e}")
+            logger.error("Erro ao deletar sessão %s: %s", session_id, e)
         
         return False
     
+    def _delete_results(self, session_id: str):
+        """Remove apenas os arquivos de resultado gravados por esta classe (e o diretório, se vazio)"""
+        results_dir = self._results_dir(session_id)
+        if not results_dir.is_dir():
+            return
+        
+        with os.scandir(results_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and _snapshot_suffix(Path(entry.name)) in SESSION_SNAPSHOT_SUFFIXES:
+                    os.remove(entry.path)
+        
+        try:
+            results_dir.rmdir()
+        except OSError:
+            pass  # Há outros arquivos no diretório: ficam onde estão
+    
     def add_error(self, error_message: str, module_name: str = None):
         """Adiciona erro à sessão"""
+        timestamp = datetime.now().isoformat()
         error_data = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'message': error_message,
             'module': module_name
         }
         
-        self.current_session_data['errors'].append(error_data)
-        self.save_session()
+        self._record('error', error_data, timestamp)
     
     def update_status(self, status: str):
         """Atualiza status da sessão"""
-        self.current_session_data['status'] = status
-        self.save_session()
+        self._record('status', {'status': status})
     
     def get_module_result(self, module_name: str) -> Any:
-        """Retorna resultado de um módulo específico"""
-        return self.current_session_data.get('results', {}).get(module_name)
+        """Retorna resultado de um módulo específico (lido sob demanda do arquivo do módulo)"""
+        if module_name in self._results_cache:
+            return self._results_cache[module_name]
+        
+        result_file = self.current_session_data.get('result_files', {}).get(module_name)
+        if result_file is None:
+            # Sessões antigas: resultado embutido no snapshot
+            return self.current_session_data.get('results', {}).get(module_name)
+        
+        try:
+            result_path = self._results_dir(self.current_session_id) / result_file
+            with open(result_path, 'rb') as f:
+                result = _load_snapshot(f.read(), _snapshot_suffix(result_path))
+        except Exception as e:
+            logger.error("Erro ao carregar resultado do módulo %s: %s", module_name, e)
+            return None
+        
+        self._results_cache[module_name] = result
+        return result
     
     def calculate_detailed_progress(self, current_module: str, module_step: int, total_steps: int) -> float:
         """Calcula progresso detalhado incluindo passos do módulo atual"""
@@ -3,9 +3,20 @@ Gerenciador de Logo USB
 Utilitário para converter e gerenciar o logo USB em base64
 """
 
-import base64
+import mmap
 import os
+import threading
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# pybase64 (SIMD) quando disponível, mesma API do base64 padrão
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# Máximo de combinações (width, height, alt, css_class) com tag HTML cacheada
+LOGO_TAG_CACHE_SIZE = 32
 
 class LogoManager:
     def __init__(self):
@@ -13,14 +24,31 @@ class LogoManager:
         self.logo_path = self.base_dir / "static" / "logo_USB.png"
         self.logo_base64_path = self.base_dir / "static" / "logo_base64.txt"
         
+        # Logo é imutável durante o processo: lido do disco uma única vez
+        self._cached_b64: Optional[str] = None
+        self._cached_data_url: Optional[str] = None
+        self._tag_cache: Dict[Tuple[str, str, str, str], str] = {}
+        
+        # Pré-carrega na criação (instância global: na importação); erros são apenas registrados
+        self.get_logo_base64()
+        
     def get_logo_base64(self):
-        """Retorna o logo em formato base64"""
+        """Retorna o logo em formato base64 (em memória após a primeira leitura)"""
+        if self._cached_b64 is not None:
+            return self._cached_b64
+        
         try:
             if self.logo_base64_path.exists():
                 with open(self.logo_base64_path, 'r') as f:
-                    return f.read().strip()
+                    logo_base64 = f.read().strip()
             else:
-                return self._convert_logo_to_base64()
+                logo_base64 = self._convert_logo_to_base64()
+            
+            # Falhas não são cacheadas: a próxima chamada tenta novamente
+            if logo_base64:
+                self._cached_b64 = logo_base64
+                self._cached_data_url = f"data:image/png;base64,{logo_base64}"
+            return logo_base64
         except Exception as e:
             print(f"❌ Erro ao carregar logo base64: {e}")
             return None
@@ -32,12 +60,16 @@ class LogoManager:
                 print(f"❌ Logo não encontrado em: {self.logo_path}")
                 return None
                 
+            # Codifica direto do arquivo mapeado em memória (sem cópia intermediária do read)
             with open(self.logo_path, "rb") as image_file:
-                logo_base64 = base64.b64encode(image_file.read()).decode('utf-8')
+                with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    logo_base64 = base64.b64encode(mapped).decode('ascii')
             
-            # Salvar para uso futuro
-            with open(self.logo_base64_path, 'w') as f:
-                f.write(logo_base64)
+            # Salvar para uso futuro em segundo plano (o chamador já usa o valor em memória)
+            threading.Thread(
+                target=self._save_base64_cache, args=(logo_base64,),
+                name="logo-base64-cache", daemon=True
+            ).start()
             
             print(f"✅ Logo convertido para base64 ({len(logo_base64)} chars)")
             return logo_base64
@@ -46,19 +78,40 @@ class LogoManager:
             print(f"❌ Erro ao converter logo: {e}")
             return None
     
+    def _save_base64_cache(self, logo_base64: str):
+        """Grava o base64 em disco via temporário + rename (nunca deixa o arquivo pela metade)"""
+        tmp_path = self.logo_base64_path.with_name(self.logo_base64_path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='ascii') as f:
+                f.write(logo_base64)
+            os.replace(tmp_path, self.logo_base64_path)
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar cache do logo em base64: {e}")
+    
     def get_logo_data_url(self):
         """Retorna o logo como data URL para uso em HTML"""
-        base64_data = self.get_logo_base64()
-        if base64_data:
-            return f"data:image/png;base64,{base64_data}"
+        if self._cached_data_url is not None:
+            return self._cached_data_url
+        
+        # get_logo_base64 preenche o data URL junto com o cache do base64
+        if self.get_logo_base64():
+            return self._cached_data_url
         return None
     
     def get_logo_html_tag(self, width="200", height="auto", alt="USB MKT AM Logo", css_class=""):
-        """Retorna uma tag HTML img com o logo"""
+        """Retorna uma tag HTML img com o logo (cacheada por combinação de parâmetros)"""
+        key = (width, height, alt, css_class)
+        tag = self._tag_cache.get(key)
+        if tag is not None:
+            return tag
+        
         data_url = self.get_logo_data_url()
         if data_url:
             class_attr = f' class="{css_class}"' if css_class else ''
-            return f'<img src="{data_url}" width="{width}" height="{height}" alt="{alt}"{class_attr}>'
+            tag = f'<img src="{data_url}" width="{width}" height="{height}" alt="{alt}"{class_attr}>'
+            if len(self._tag_cache) < LOGO_TAG_CACHE_SIZE:
+                self._tag_cache[key] = tag
+            return tag
         return f'<div class="logo-placeholder">Logo não disponível</div>'
 
 # Instância global para uso em outros módulos